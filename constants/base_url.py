@@ -1,3 +1,5 @@
+import os
+
 X1337 = "https://1337x.to"
 TGX = "https://torrentgalaxy.to"
 TORLOCK = "https://www.torlock.com"
@@ -14,3 +16,34 @@ TORRENTFUNK = "https://www.torrentfunk.com"
 GLODLS = "https://glodls.to"
 TORRENTPROJECT = "https://torrentproject2.com"
 YOURBITTORRENT = "https://yourbittorrent.com"
+
+
+def _mirrors(name, base_url, *mirrors):
+    # e.g. X1337_MIRRORS="https://1337x.to,https://1337x.st" replaces the defaults
+    override = os.environ.get(name + "_MIRRORS")
+    if override:
+        return [m.strip().rstrip("/") for m in override.split(",") if m.strip()]
+    return [base_url, *mirrors]
+
+
+# Interchangeable domains serving the same pages, keyed by the default domain.
+# Only the default domain unless <SITE>_MIRRORS lists more: other domains get
+# live traffic (hedges, warm-up, probes) and appear in returned urls.
+MIRRORS = {
+    X1337: _mirrors("X1337", X1337),
+    TGX: _mirrors("TGX", TGX),
+    TORLOCK: _mirrors("TORLOCK", TORLOCK),
+    PIRATEBAY: _mirrors("PIRATEBAY", PIRATEBAY),
+    NYAASI: _mirrors("NYAASI", NYAASI),
+    ZOOQLE: _mirrors("ZOOQLE", ZOOQLE),
+    KICKASS: _mirrors("KICKASS", KICKASS),
+    BITSEARCH: _mirrors("BITSEARCH", BITSEARCH),
+    MAGNETDL: _mirrors("MAGNETDL", MAGNETDL),
+    LIBGEN: _mirrors("LIBGEN", LIBGEN),
+    YTS: _mirrors("YTS", YTS),
+    LIMETORRENT: _mirrors("LIMETORRENT", LIMETORRENT),
+    TORRENTFUNK: _mirrors("TORRENTFUNK", TORRENTFUNK),
+    GLODLS: _mirrors("GLODLS", GLODLS),
+    TORRENTPROJECT: _mirrors("TORRENTPROJECT", TORRENTPROJECT),
+    YOURBITTORRENT: _mirrors("YOURBITTORRENT", YOURBITTORRENT),
+}
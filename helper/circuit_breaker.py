@@ -0,0 +1,144 @@
+import os
+import asyncio
+import time
+from collections import deque
+
+BREAKER_WINDOW = int(os.environ.get("BREAKER_WINDOW", 20))
+BREAKER_MIN_CALLS = int(os.environ.get("BREAKER_MIN_CALLS", 5))
+BREAKER_FAILURE_RATIO = float(os.environ.get("BREAKER_FAILURE_RATIO", 0.5))
+BREAKER_OPEN_SECONDS = float(os.environ.get("BREAKER_OPEN_SECONDS", 60))
+BREAKER_SLOW_CALL = float(os.environ.get("BREAKER_SLOW_CALL", 10))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, site, retry_in):
+        super().__init__(f"{site} is temporarily unavailable")
+        self.site = site
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """
+    Tracks the recent outcomes of one site.
+    Closed: calls go through. Open: calls fail fast until BREAKER_OPEN_SECONDS
+    have passed. Half open: a single trial call decides whether to close again.
+    A call fails when it raises, returns None (blocked) or is slower than
+    BREAKER_SLOW_CALL.
+    """
+
+    def __init__(self, site):
+        self.site = site
+        self.state = CLOSED
+        self.latency = None
+        self._outcomes = deque(maxlen=BREAKER_WINDOW)
+        self._opened_at = 0.0
+        self._trial_running = False
+
+    def retry_in(self):
+        return max(0.0, self._opened_at + BREAKER_OPEN_SECONDS - time.monotonic())
+
+    def allow(self):
+        if self.state == OPEN and self.retry_in() == 0:
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN:
+            if self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+        return self.state == CLOSED
+
+    def record(self, ok, latency=None):
+        if latency is not None:
+            self.latency = (
+                latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+            )
+        if self.state == HALF_OPEN:
+            self._trial_running = False
+            if ok:
+                self.state = CLOSED
+                self._outcomes.clear()
+            else:
+                self._open()
+            return
+        self._outcomes.append(ok)
+        failures = self._outcomes.count(False)
+        if (
+            len(self._outcomes) >= BREAKER_MIN_CALLS
+            and failures / len(self._outcomes) >= BREAKER_FAILURE_RATIO
+        ):
+            self._open()
+
+    def cancel_trial(self):
+        if self.state == HALF_OPEN:
+            self._trial_running = False
+
+    def _open(self):
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+
+    def stats(self):
+        calls = len(self._outcomes)
+        return {
+            "state": self.state,
+            "latency": round(self.latency, 3) if self.latency is not None else None,
+            "error_rate": (
+                round(self._outcomes.count(False) / calls, 2) if calls else 0.0
+            ),
+            "retry_in": round(self.retry_in(), 1) if self.state == OPEN else 0,
+        }
+
+
+_breakers = {}
+
+
+def get_breaker(site):
+    breaker = _breakers.get(site)
+    if breaker is None:
+        breaker = _breakers[site] = CircuitBreaker(site)
+    return breaker
+
+
+async def call_site(site, coro):
+    """
+    Awaits a site's search/trending/recent coroutine through its breaker.
+    Raises CircuitOpenError without touching the site while it is open.
+    """
+    breaker = get_breaker(site)
+    if not breaker.allow():
+        coro.close()
+        raise CircuitOpenError(site, breaker.retry_in())
+    start = time.monotonic()
+    try:
+        result = await coro
+    except asyncio.CancelledError:
+        latency = time.monotonic() - start
+        if latency >= BREAKER_SLOW_CALL:
+            breaker.record(False, latency)
+        else:
+            breaker.cancel_trial()
+        raise
+    except Exception:
+        breaker.record(False, time.monotonic() - start)
+        raise
+    latency = time.monotonic() - start
+    breaker.record(result is not None and latency < BREAKER_SLOW_CALL, latency)
+    return result
+
+
+def check_site(site):
+    """
+    Raises CircuitOpenError while the site is open, without taking the half
+    open trial or recording the outcome: detail lookups of urls sent by
+    clients must not decide whether the site's listings are served.
+    """
+    breaker = get_breaker(site)
+    if breaker.state == OPEN and breaker.retry_in() > 0:
+        raise CircuitOpenError(site, breaker.retry_in())
+
+
+def sites_health(sites):
+    return {site: get_breaker(site).stats() for site in sites}
@@ -0,0 +1,80 @@
+import os
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+DETAIL_CACHE_ENTRIES = int(os.environ.get("DETAIL_CACHE_ENTRIES", 5000))
+# Magnets, files and posters of a torrent do not change, a week by default.
+DETAIL_CACHE_TTL = float(os.environ.get("DETAIL_CACHE_TTL", 7 * 86400))
+
+# Counts a listing reports more recently than any cached detail page.
+VOLATILE = ("seeders", "leechers", "downloads")
+
+
+def _url_key(site, url):
+    # Without scheme and host, the same torrent on another mirror is a hit.
+    parts = urlsplit(url)
+    path = parts.path + ("?" + parts.query if parts.query else "")
+    return ("url", site, path)
+
+
+class DetailCache:
+    """
+    What each torrent's detail page added to its row, by site and url path
+    and, once a page gave it, by infohash. Bounded to DETAIL_CACHE_ENTRIES
+    torrents, least recently used first out, each kept DETAIL_CACHE_TTL
+    seconds.
+    """
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        # url key -> (expires_at, hash key, detail)
+        self._entries = OrderedDict()
+        # hash key -> url key
+        self._hashes = {}
+
+    def get(self, site, url, infohash=None):
+        key = _url_key(site, url)
+        if key not in self._entries and infohash:
+            key = self._hashes.get(("hash", infohash.upper()), key)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] <= time.monotonic():
+            self._drop(key)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[2]
+
+    def set(self, site, url, detail):
+        key = _url_key(site, url)
+        self._drop(key)
+        detail = {k: v for k, v in detail.items() if k not in VOLATILE}
+        hash_key = ("hash", detail["hash"].upper()) if detail.get("hash") else None
+        self._entries[key] = (time.monotonic() + self.ttl, hash_key, detail)
+        if hash_key is not None:
+            self._hashes[hash_key] = key
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None and self._hashes.get(entry[1]) == key:
+            del self._hashes[entry[1]]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+detail_cache = DetailCache(DETAIL_CACHE_ENTRIES, DETAIL_CACHE_TTL)
@@ -0,0 +1,78 @@
+import os
+import asyncio
+import socket
+import time
+from aiohttp.abc import AbstractResolver
+from aiohttp.resolver import DefaultResolver
+from .single_flight import SingleFlight
+
+DNS_TTL = float(os.environ.get("DNS_TTL", 300))
+
+# (host, port, family) -> (expires_at, resolved addresses), shared by every
+# session so a recreated session does not start cold.
+_entries = {}
+_lookups = SingleFlight()
+
+
+class CachingResolver(AbstractResolver):
+    """
+    Resolver that keeps answers for DNS_TTL seconds.
+    An expired answer is still returned while a fresh lookup runs in the
+    background, so a request never waits on DNS for a host seen before.
+    """
+
+    def __init__(self):
+        self._resolver = DefaultResolver()
+        self._refreshing = set()
+
+    async def resolve(self, host, port=0, family=socket.AF_INET):
+        key = (host, port, family)
+        entry = _entries.get(key)
+        if entry is None:
+            return await self._lookup(key)
+        expires_at, addresses = entry
+        if expires_at <= time.monotonic() and key not in self._refreshing:
+            self._refreshing.add(key)
+            task = asyncio.ensure_future(self._lookup(key))
+            task.add_done_callback(lambda done: self._refreshed(key, done))
+        return addresses
+
+    def _refreshed(self, key, task):
+        self._refreshing.discard(key)
+        if not task.cancelled():
+            # A failed refresh keeps serving the previous answer.
+            task.exception()
+
+    async def _lookup(self, key):
+        return await _lookups.do(key, lambda: self._store(key))
+
+    async def _store(self, key):
+        host, port, family = key
+        addresses = await self._resolver.resolve(host, port, family)
+        _entries[key] = (time.monotonic() + DNS_TTL, addresses)
+        return addresses
+
+    async def refresh(self):
+        """
+        Looks up every cached host again, failures keep the old answer.
+        """
+        await asyncio.gather(
+            *[self._lookup(key) for key in list(_entries)], return_exceptions=True
+        )
+
+    async def close(self):
+        await self._resolver.close()
+
+
+async def refresh_dns():
+    """
+    Keeps the cached answers fresh in the background.
+    """
+    resolver = CachingResolver()
+    try:
+        while True:
+            # Twice per TTL so answers are renewed before they expire.
+            await asyncio.sleep(DNS_TTL / 2)
+            await resolver.refresh()
+    finally:
+        await resolver.close()
@@ -1,9 +1,40 @@
-from fastapi.encoders import jsonable_encoder
-from fastapi.responses import JSONResponse
+import orjson
+from fastapi.responses import ORJSONResponse, Response
+
+
+def _default(obj):
+    # Torrent records and anything else that knows its dict form.
+    if hasattr(obj, "to_dict"):
+        return obj.to_dict()
+    raise TypeError(f"{type(obj).__name__} is not JSON serializable")
+
+
+def json_dumps(content):
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(ORJSONResponse):
+    """
+    JSON response rendered by orjson, without the jsonable_encoder pass
+    FastAPI runs on returned dicts.
+    """
+
+    def render(self, content):
+        return json_dumps(content)
 
 
 def error_handler(status_code, json_message):
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=status_code,
-        content=jsonable_encoder(json_message),
+        content=json_message,
     )
+
+
+def json_response(data):
+    """
+    Returns a route's result as a FastJSONResponse, responses built
+    earlier (e.g. cached errors) as they are.
+    """
+    if isinstance(data, Response):
+        return data
+    return FastJSONResponse(data)
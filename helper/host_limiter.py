@@ -0,0 +1,104 @@
+import os
+import asyncio
+import time
+from collections import deque
+from urllib.parse import urlsplit
+from constants.base_url import LIBGEN, TORRENTPROJECT, MIRRORS
+
+HOST_CONCURRENCY_INITIAL = int(os.environ.get("HOST_CONCURRENCY_INITIAL", 4))
+HOST_CONCURRENCY_MIN = int(os.environ.get("HOST_CONCURRENCY_MIN", 1))
+HOST_CONCURRENCY_MAX = int(os.environ.get("HOST_CONCURRENCY_MAX", 16))
+HOST_TARGET_LATENCY = float(os.environ.get("HOST_TARGET_LATENCY", 3))
+
+# Status codes that mean the upstream wants us to slow down.
+THROTTLE_STATUSES = {403, 429, 503}
+
+# Hosts known to block anything above a few parallel requests.
+HOST_CONCURRENCY_CAPS = {
+    urlsplit(mirror).hostname: 3
+    for base_url in (LIBGEN, TORRENTPROJECT)
+    for mirror in MIRRORS[base_url]
+}
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit for one upstream host, adjusted with AIMD.
+    Every fast successful response raises the limit by 1/limit (about one
+    slot per round trip), a throttled, failed or slow response halves it,
+    at most once per observed round trip.
+    """
+
+    def __init__(self, initial, minimum, maximum, target_latency):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.target_latency = target_latency
+        self.in_flight = 0
+        self._waiters = deque()
+        self._hold_until = 0.0
+
+    async def acquire(self):
+        while self.in_flight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                elif waiter.done() and not waiter.cancelled():
+                    # Woken but no longer interested, pass the slot on.
+                    self._wake()
+                raise
+        self.in_flight += 1
+
+    def release(self, latency, ok):
+        """
+        ok is True for a healthy response, False for an error or a throttle
+        status and None when the outcome says nothing about the host.
+        """
+        self.in_flight -= 1
+        now = time.monotonic()
+        if ok and latency <= self.target_latency:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+        elif ok is not None and now >= self._hold_until:
+            self.limit = max(self.minimum, self.limit / 2)
+            self._hold_until = now + max(latency, 0.1)
+        self._wake()
+
+    def _wake(self):
+        free = int(self.limit) - self.in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    def stats(self):
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+        }
+
+
+_limiters = {}
+
+
+def get_limiter(url):
+    """
+    Returns the limiter shared by every request to the host of url.
+    """
+    host = urlsplit(url).hostname
+    limiter = _limiters.get(host)
+    if limiter is None:
+        maximum = HOST_CONCURRENCY_CAPS.get(host, HOST_CONCURRENCY_MAX)
+        limiter = AdaptiveLimiter(
+            HOST_CONCURRENCY_INITIAL,
+            HOST_CONCURRENCY_MIN,
+            maximum,
+            HOST_TARGET_LATENCY,
+        )
+        _limiters[host] = limiter
+    return limiter
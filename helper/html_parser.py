@@ -0,0 +1,54 @@
+import os
+import soupsieve
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml  # noqa: F401
+
+    _DEFAULT_PARSER = "lxml"
+except ImportError:
+    _DEFAULT_PARSER = "html.parser"
+
+# "lxml" (C tree builder, several times faster) when installed, otherwise
+# the pure python "html.parser". HTML_PARSER picks one explicitly.
+HTML_PARSER = os.environ.get("HTML_PARSER", _DEFAULT_PARSER)
+
+
+def make_soup(html, parse_only=None):
+    """
+    Builds the soup every site parser works on with the configured backend.
+    """
+    return BeautifulSoup(html, HTML_PARSER, parse_only=parse_only)
+
+
+class Regions(SoupStrainer):
+    """
+    Keeps only the parts of a page matching any of the given SoupStrainers
+    (the listing rows, the pagination block, ...), so the tree is never
+    built for scripts, headers and sidebars. Selectors keep working as long
+    as they start inside one of the regions.
+    """
+
+    def __init__(self, *regions):
+        super().__init__()
+        self.regions = regions
+
+    def allow_tag_creation(self, nsprefix, name, attrs):
+        if attrs and isinstance(attrs.get("class"), str):
+            # The tree builder has not split class="a b" yet, class_="a"
+            # would only match an element with that single class.
+            attrs = {**attrs, "class": attrs["class"].split()}
+        return any(
+            region.allow_tag_creation(nsprefix, name, attrs) for region in self.regions
+        )
+
+    def allow_string_creation(self, string):
+        return False
+
+
+def css(selector):
+    """
+    Compiles a CSS selector once, at import, for selector.select(soup) and
+    selector.select_one(soup) instead of re-parsing it on every page.
+    """
+    return soupsieve.compile(selector)
@@ -1,19 +1,221 @@
 import os
 import asyncio
+import time
+from contextlib import asynccontextmanager
+import aiohttp
 from .asyncioPoliciesFix import decorator_asyncio_fix
+from .host_limiter import get_limiter, THROTTLE_STATUSES
+from .single_flight import SingleFlight
+from . import mirrors
+from .streaming import read_until
+from .dns_cache import CachingResolver
+from .upstream_cache import (
+    validators,
+    conditional_headers,
+    store_validators,
+    parse_key,
+    cached_parse,
+    store_parse,
+)
+from .parse_executor import run_parse
 from constants.headers import HEADER_AIO
 
 HTTP_PROXY = os.environ.get("HTTP_PROXY", None)
+HTTP_POOL_LIMIT = int(os.environ.get("HTTP_POOL_LIMIT", 100))
+HTTP_POOL_LIMIT_PER_HOST = int(os.environ.get("HTTP_POOL_LIMIT_PER_HOST", 30))
+HTTP_KEEPALIVE_TIMEOUT = float(os.environ.get("HTTP_KEEPALIVE_TIMEOUT", 60))
+HTTP_TIMEOUT = float(os.environ.get("HTTP_TIMEOUT", 30))
+WARMUP_TIMEOUT = float(os.environ.get("WARMUP_TIMEOUT", 5))
+
+_session = None
+_session_loop = None
+
+# Identical upstream fetches running at the same time share one request.
+_upstream_flight = SingleFlight()
+
+
+def get_session():
+    """
+    Returns the process wide aiohttp session, creating it on first use.
+    Connections are pooled and kept alive per host so DNS lookups and
+    TLS handshakes are paid once instead of on every scraper call.
+    """
+    global _session, _session_loop
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.closed or _session_loop is not loop:
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_POOL_LIMIT,
+            limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+            keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+            # DNS answers are cached (and refreshed) by the resolver.
+            use_dns_cache=False,
+            resolver=CachingResolver(),
+        )
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT),
+        )
+        _session_loop = loop
+    return _session
+
+
+async def close_session():
+    """
+    Closes the shared session and its connection pool.
+    """
+    global _session, _session_loop
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+    _session_loop = None
+
+
+async def warm_up(session, urls):
+    """
+    Resolves every upstream host and opens a keep-alive connection to it,
+    so the first real request does not pay for DNS, TCP and TLS.
+    Gives up after WARMUP_TIMEOUT seconds, unreachable hosts are skipped.
+    """
+    if WARMUP_TIMEOUT <= 0:
+        return
+
+    async def connect(url):
+        try:
+            async with session.head(
+                url, headers=HEADER_AIO, proxy=HTTP_PROXY, allow_redirects=False
+            ) as r:
+                await r.read()
+        except asyncio.CancelledError:
+            raise
+        except:
+            ...
+
+    tasks = [asyncio.create_task(connect(url)) for url in urls]
+    if tasks:
+        _, pending = await asyncio.wait(tasks, timeout=WARMUP_TIMEOUT)
+        for task in pending:
+            task.cancel()
 
 
 class Scraper:
+    @staticmethod
+    @asynccontextmanager
+    async def session():
+        # The shared session outlives the request, it is closed on app shutdown.
+        yield get_session()
+
     @decorator_asyncio_fix
-    async def _get_html(self, session, url):
+    async def _get_html(self, session, url, encoding=None, stop=None, revalidate=True):
+        """
+        revalidate=False for pages cached in parsed form elsewhere (detail
+        pages), their bodies are not kept for conditional requests.
+        """
+        return await _upstream_flight.do(
+            (url, encoding, stop.key if stop else None),
+            lambda: self._hedged_fetch(session, url, encoding, stop, revalidate),
+        )
+
+    async def _hedged_fetch(self, session, url, encoding, stop=None, revalidate=True):
+        """
+        Fetches url and, when its site has mirrors, sends the same request to
+        the next best mirror once the first one is slower than its usual p95
+        (or has failed). The first body to arrive wins, the other is cancelled.
+        """
+        pool, mirror = mirrors.pool_for_url(url)
+        if pool is None or len(pool.mirrors) < 2:
+            return await self._fetch(session, url, encoding, stop, revalidate)
+
+        tasks = [
+            asyncio.ensure_future(
+                self._fetch(session, url, encoding, stop, revalidate)
+            )
+        ]
         try:
-            async with session.get(url, headers=HEADER_AIO, proxy=HTTP_PROXY) as r:
-                return await r.text()
+            await asyncio.wait(tasks, timeout=pool.hedge_delay(mirror))
+            if tasks[0].done() and tasks[0].result() is not None:
+                return tasks[0].result()
+            alternate = pool.best(exclude=mirror)
+            if alternate is None:
+                return await tasks[0]
+            alternate_url = alternate + url[len(mirror) :]
+            tasks.append(
+                asyncio.ensure_future(
+                    self._fetch(session, alternate_url, encoding, stop, revalidate)
+                )
+            )
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.result() is not None:
+                        return task.result()
+            return None
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _fetch(self, session, url, encoding, stop=None, revalidate=True):
+        limiter = get_limiter(url)
+        await limiter.acquire()
+        start = time.monotonic()
+        ok = None
+        cached = validators.get((url, encoding)) if revalidate else None
+        headers = HEADER_AIO
+        if cached is not None:
+            headers = {**HEADER_AIO, **conditional_headers(cached)}
+        try:
+            async with session.get(url, headers=headers, proxy=HTTP_PROXY) as r:
+                ok = r.status not in THROTTLE_STATUSES and r.status < 500
+                if r.status == 304 and cached is not None:
+                    return cached["body"]
+                if stop is not None and cached is None:
+                    body, stopped = await read_until(r, stop, encoding)
+                    # Only a whole page can stand in for the next 304.
+                    if not stopped and r.status == 200 and revalidate:
+                        store_validators((url, encoding), r.headers, body)
+                    return body
+                body = await r.text(encoding=encoding)
+                if r.status == 200 and revalidate:
+                    store_validators((url, encoding), r.headers, body)
+                return body
+        except asyncio.CancelledError:
+            ok = None
+            raise
         except:
+            ok = False
             return None
+        finally:
+            latency = time.monotonic() - start
+            limiter.release(latency, ok)
+            if ok is not None:
+                mirrors.record(url, latency, ok)
+
+    async def get_all_results(self, session, url, stop=None):
+        """
+        With a StreamStop the page is streamed and the connection dropped as
+        soon as the rows the caller asked for (and pagination) have arrived.
+        """
+        return await asyncio.gather(
+            asyncio.create_task(self._get_html(session, url, stop=stop))
+        )
 
-    async def get_all_results(self, session, url):
-        return await asyncio.gather(asyncio.create_task(self._get_html(session, url)))
+    async def parse(self, parser, htmls, *args):
+        """
+        Runs a site parser off the event loop, reusing the result of an
+        earlier run on the same page content.
+        """
+        key = parse_key(parser, htmls, args)
+        result = cached_parse(key)
+        if result is None:
+            try:
+                result = await run_parse(parser, htmls, *args)
+            except asyncio.CancelledError:
+                raise
+            except:
+                # The executor failed (not the parser, parsers catch their
+                # own errors), parse on the loop rather than lose the page.
+                result = parser(htmls, *args)
+            store_parse(key, result)
+        return result
@@ -35,6 +35,7 @@ all_sites = {
             "movies",
         ],
         "limit": 100,
+        "details_available": True,
     },
     "torlock": {
         "website": Torlock,
@@ -57,6 +58,7 @@ all_sites = {
             "images",
         ],  # ebooks
         "limit": 50,
+        "details_available": True,
     },
     "zooqle": {
         "website": Zooqle,
@@ -67,6 +69,7 @@ all_sites = {
         "recent_category_available": False,
         "categories": [],
         "limit": 30,
+        "details_available": False,
     },
     "magnetdl": {
         "website": Magnetdl,
@@ -78,6 +81,7 @@ all_sites = {
         # e-books
         "categories": ["apps", "movies", "music", "games", "tv", "books"],
         "limit": 40,
+        "details_available": False,
     },
     "tgx": {
         "website": TorrentGalaxy,
@@ -99,6 +103,7 @@ all_sites = {
             "books",
         ],
         "limit": 50,
+        "details_available": True,
     },
     "nyaasi": {
         "website": NyaaSi,
@@ -109,6 +114,7 @@ all_sites = {
         "recent_category_available": False,
         "categories": [],
         "limit": 50,
+        "details_available": False,
     },
     "piratebay": {
         "website": PirateBay,
@@ -119,6 +125,7 @@ all_sites = {
         "recent_category_available": True,
         "categories": ["tv"],
         "limit": 50,
+        "details_available": False,
     },
     "bitsearch": {
         "website": Bitsearch,
@@ -129,6 +136,7 @@ all_sites = {
         "recent_category_available": False,
         "categories": [],
         "limit": 50,
+        "details_available": False,
     },
     "kickass": {
         "website": Kickass,
@@ -150,6 +158,7 @@ all_sites = {
             "books",
         ],  # television applications
         "limit": 50,
+        "details_available": True,
     },
     "libgen": {
         "website": Libgen,
@@ -160,6 +169,7 @@ all_sites = {
         "recent_category_available": False,
         "categories": [],
         "limit": 25,
+        "details_available": True,
     },
     "yts": {
         "website": Yts,
@@ -170,6 +180,7 @@ all_sites = {
         "recent_category_available": False,
         "categories": [],
         "limit": 20,
+        "details_available": True,
     },
     "limetorrent": {
         "website": Limetorrent,
@@ -189,6 +200,7 @@ all_sites = {
             "books",
         ],  # applications and tv-shows
         "limit": 50,
+        "details_available": True,
     },
     "torrentfunk": {
         "website": TorrentFunk,
@@ -208,6 +220,7 @@ all_sites = {
             "books",
         ],  # television # software #adult # ebooks
         "limit": 50,
+        "details_available": True,
     },
     "glodls": {
         "website": Glodls,
@@ -218,6 +231,7 @@ all_sites = {
         "recent_category_available": False,
         "categories": [],
         "limit": 45,
+        "details_available": False,
     },
     "torrentproject": {
         "website": TorrentProject,
@@ -228,6 +242,7 @@ all_sites = {
         "recent_category_available": False,
         "categories": [],
         "limit": 20,
+        "details_available": True,
     },
     "ybt": {
         "website": YourBittorrent,
@@ -249,6 +264,7 @@ all_sites = {
             "other",
         ],  # book -> ebooks
         "limit": 20,
+        "details_available": True,
     },
 }
 
@@ -0,0 +1,145 @@
+import os
+import asyncio
+import time
+from collections import deque
+from urllib.parse import urlsplit
+import aiohttp
+from constants.base_url import MIRRORS
+from constants.headers import HEADER_AIO
+
+HEDGE_DELAY = float(os.environ.get("HEDGE_DELAY", 2))
+HEDGE_MIN_DELAY = float(os.environ.get("HEDGE_MIN_DELAY", 0.3))
+MIRROR_PROBE_INTERVAL = float(os.environ.get("MIRROR_PROBE_INTERVAL", 300))
+MIRROR_COOLDOWN = float(os.environ.get("MIRROR_COOLDOWN", 60))
+
+HTTP_PROXY = os.environ.get("HTTP_PROXY", None)
+
+
+class MirrorPool:
+    """
+    Latency and health of the interchangeable domains of one site.
+    """
+
+    def __init__(self, mirrors):
+        self.mirrors = list(mirrors)
+        self._latency = {mirror: None for mirror in self.mirrors}
+        self._samples = {mirror: deque(maxlen=50) for mirror in self.mirrors}
+        self._failures = {mirror: 0 for mirror in self.mirrors}
+        self._down_until = {mirror: 0.0 for mirror in self.mirrors}
+
+    def record(self, mirror, latency, ok):
+        if ok:
+            self._failures[mirror] = 0
+            self._down_until[mirror] = 0.0
+            self._samples[mirror].append(latency)
+            previous = self._latency[mirror]
+            # exponentially weighted so one slow page does not flip the choice
+            self._latency[mirror] = (
+                latency if previous is None else 0.8 * previous + 0.2 * latency
+            )
+        else:
+            self._failures[mirror] += 1
+            if self._failures[mirror] >= 3:
+                self._down_until[mirror] = time.monotonic() + MIRROR_COOLDOWN
+
+    def healthy(self):
+        now = time.monotonic()
+        return [m for m in self.mirrors if self._down_until[m] <= now]
+
+    def best(self, exclude=None):
+        """
+        Fastest healthy mirror, mirrors without data keep their listed order.
+        """
+        candidates = [m for m in self.healthy() if m != exclude]
+        if not candidates:
+            return None if exclude else self.mirrors[0]
+        measured = [m for m in candidates if self._latency[m] is not None]
+        if measured:
+            return min(measured, key=lambda m: self._latency[m])
+        return candidates[0]
+
+    def hedge_delay(self, mirror):
+        samples = sorted(self._samples[mirror])
+        if len(samples) < 5:
+            return HEDGE_DELAY
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        return max(HEDGE_MIN_DELAY, p95)
+
+    def stats(self):
+        now = time.monotonic()
+        return {
+            mirror: {
+                "latency": self._latency[mirror],
+                "healthy": self._down_until[mirror] <= now,
+            }
+            for mirror in self.mirrors
+        }
+
+
+pools = {base_url: MirrorPool(mirrors) for base_url, mirrors in MIRRORS.items()}
+
+
+def select_mirror(base_url):
+    """
+    Returns the base url a scraper should build its urls on.
+    """
+    pool = pools.get(base_url)
+    return pool.best() if pool is not None else base_url
+
+
+def on_site(base_url, url):
+    """
+    Whether url is on one of the site's own domains (same scheme and host),
+    so urls sent by clients are never fetched from anywhere else.
+    """
+    parts = urlsplit(url)
+    return any(
+        (parts.scheme, parts.netloc.lower()) == urlsplit(mirror)[:2]
+        for mirror in MIRRORS.get(base_url, [base_url])
+    )
+
+
+def pool_for_url(url):
+    for pool in pools.values():
+        for mirror in pool.mirrors:
+            if url.startswith(mirror):
+                return pool, mirror
+    return None, None
+
+
+def record(url, latency, ok):
+    pool, mirror = pool_for_url(url)
+    if pool is not None:
+        pool.record(mirror, latency, ok)
+
+
+async def probe_mirrors(session):
+    """
+    Measures every mirror of every site in the background so the scrapers
+    start on the fastest one and failed mirrors come back once they recover.
+    """
+    timeout = aiohttp.ClientTimeout(total=10)
+
+    async def probe(pool, mirror):
+        start = time.monotonic()
+        try:
+            async with session.get(
+                mirror, headers=HEADER_AIO, proxy=HTTP_PROXY, timeout=timeout
+            ) as r:
+                await r.read()
+                pool.record(mirror, time.monotonic() - start, r.status < 400)
+        except asyncio.CancelledError:
+            raise
+        except:
+            pool.record(mirror, time.monotonic() - start, False)
+
+    while True:
+        await asyncio.gather(
+            *[
+                probe(pool, mirror)
+                for pool in pools.values()
+                if len(pool.mirrors) > 1
+                for mirror in pool.mirrors
+            ]
+        )
+        await asyncio.sleep(MIRROR_PROBE_INTERVAL)
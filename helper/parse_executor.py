@@ -0,0 +1,141 @@
+import os
+import asyncio
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# "thread", "inline" (parse on the event loop, the old behaviour) or
+# "process". Processes are opt-in: each gunicorn worker starts its own pool
+# of PARSE_WORKERS interpreters (importing bs4, lxml, aiohttp), with -w 4 on
+# a 4 CPU host 16 of them, too many for a small container.
+PARSE_EXECUTOR = os.environ.get("PARSE_EXECUTOR", "thread")
+PARSE_WORKERS = int(os.environ.get("PARSE_WORKERS", os.cpu_count() or 1))
+PARSE_BATCH_SIZE = int(os.environ.get("PARSE_BATCH_SIZE", 32))
+PARSE_BATCH_WAIT = float(os.environ.get("PARSE_BATCH_WAIT", 0.005))
+
+_executor = None
+_batcher = None
+
+
+def get_executor():
+    """
+    Returns the executor parsing runs on, None when parsing runs inline.
+    """
+    global _executor
+    mode = PARSE_EXECUTOR
+    if mode == "inline":
+        return None
+    if _executor is None:
+        if mode == "process":
+            try:
+                # spawn, forking a process that runs an event loop and
+                # threads is not safe.
+                _executor = ProcessPoolExecutor(
+                    PARSE_WORKERS, mp_context=multiprocessing.get_context("spawn")
+                )
+            except (OSError, NotImplementedError):
+                # No working multiprocessing (e.g. AWS Lambda has no /dev/shm).
+                _executor = None
+        if _executor is None:
+            _executor = ThreadPoolExecutor(PARSE_WORKERS, thread_name_prefix="parse")
+    return _executor
+
+
+def shutdown_executor():
+    global _executor, _batcher
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+    _executor = None
+    _batcher = None
+
+
+def _run_batch(jobs):
+    results = []
+    for func, args in jobs:
+        try:
+            results.append(func(*args))
+        except:
+            results.append(None)
+    return results
+
+
+async def run_parse(func, *args):
+    """
+    Runs a parser on the parse executor. func and its arguments (the page
+    text and the site object the parser is bound to) are pickled when the
+    executor is a process pool, so parsers must be pure: they return their
+    result instead of changing the site object.
+    """
+    global _executor
+    executor = get_executor()
+    if executor is None:
+        return func(*args)
+    try:
+        return await asyncio.get_running_loop().run_in_executor(
+            executor, func, *args
+        )
+    except BrokenProcessPool:
+        # A worker died, the next call starts a new pool.
+        if _executor is executor:
+            _executor = None
+        raise
+
+
+class _Batcher:
+    """
+    Collects parse jobs submitted within PARSE_BATCH_WAIT seconds of each
+    other and sends them to the executor together, so a page of detail
+    pages costs a few round trips to the workers instead of one each.
+    """
+
+    def __init__(self, loop):
+        self.loop = loop
+        self._jobs = []
+        self._futures = []
+        self._timer = None
+        self._running = set()
+
+    def submit(self, func, args):
+        future = self.loop.create_future()
+        self._jobs.append((func, args))
+        self._futures.append(future)
+        if len(self._jobs) >= PARSE_BATCH_SIZE:
+            self._flush()
+        elif self._timer is None:
+            self._timer = self.loop.call_later(PARSE_BATCH_WAIT, self._flush)
+        return future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        jobs, futures = self._jobs, self._futures
+        self._jobs, self._futures = [], []
+        if jobs:
+            task = self.loop.create_task(self._run(jobs, futures))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, jobs, futures):
+        try:
+            results = await run_parse(_run_batch, jobs)
+        except Exception:
+            # The executor failed, parse on the loop rather than lose the pages.
+            results = _run_batch(jobs)
+        for future, result in zip(futures, results):
+            if not future.done():
+                future.set_result(result)
+
+
+async def run_parse_batched(func, *args):
+    """
+    Like run_parse, but shares the trip to the executor with other calls
+    made at about the same time. A failing parser yields None.
+    """
+    global _batcher
+    if get_executor() is None:
+        return _run_batch([(func, args)])[0]
+    loop = asyncio.get_running_loop()
+    if _batcher is None or _batcher.loop is not loop:
+        _batcher = _Batcher(loop)
+    return await _batcher.submit(func, args)
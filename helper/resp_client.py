@@ -0,0 +1,97 @@
+import asyncio
+from urllib.parse import urlsplit
+
+
+class RespError(Exception):
+    """
+    Error reply of a Redis protocol server.
+    """
+
+
+def encode_command(*args):
+    out = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if isinstance(arg, str):
+            arg = arg.encode()
+        elif isinstance(arg, int):
+            arg = str(arg).encode()
+        out.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(out)
+
+
+async def read_reply(reader):
+    line = await reader.readuntil(b"\r\n")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b"+":
+        return rest.decode()
+    if kind == b"-":
+        raise RespError(rest.decode())
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        length = int(rest)
+        if length < 0:
+            return None
+        return (await reader.readexactly(length + 2))[:-2]
+    if kind == b"*":
+        length = int(rest)
+        if length < 0:
+            return None
+        return [await read_reply(reader) for _ in range(length)]
+    raise RespError(f"Unexpected reply {line!r}")
+
+
+class RespClient:
+    """
+    Minimal client of the Redis protocol (Redis, Valkey, KeyDB, ...) over
+    one connection, opened on first use and again after an error.
+    url: redis://[:password@]host[:port][/db]
+    """
+
+    def __init__(self, url, timeout=1.0):
+        parts = urlsplit(url)
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or 6379
+        self.password = parts.password
+        self.db = int(parts.path.strip("/") or 0)
+        self.timeout = timeout
+        self._streams = None
+        self._lock = None
+
+    async def _connect(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        self._streams = reader, writer
+        if self.password:
+            await self._call("AUTH", self.password)
+        if self.db:
+            await self._call("SELECT", self.db)
+
+    async def _call(self, *args):
+        reader, writer = self._streams
+        writer.write(encode_command(*args))
+        await writer.drain()
+        return await read_reply(reader)
+
+    async def execute(self, *args):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            connecting = self._streams is None
+            try:
+                if connecting:
+                    await asyncio.wait_for(self._connect(), self.timeout)
+                return await asyncio.wait_for(self._call(*args), self.timeout)
+            except RespError:
+                if connecting:
+                    # AUTH or SELECT refused, do not keep the connection.
+                    self.close()
+                raise
+            except BaseException:
+                # The reply may still be on its way, start over next time.
+                self.close()
+                raise
+
+    def close(self):
+        if self._streams is not None:
+            self._streams[1].close()
+            self._streams = None
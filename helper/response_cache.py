@@ -0,0 +1,558 @@
+import os
+import time
+import asyncio
+import contextvars
+import sqlite3
+import tempfile
+import threading
+from collections import OrderedDict
+import orjson
+from fastapi.responses import Response
+from .error_messages import json_dumps, FastJSONResponse
+from .resp_client import RespClient, RespError
+from .single_flight import SingleFlight
+
+RESPONSE_CACHE_ENTRIES = int(os.environ.get("RESPONSE_CACHE_ENTRIES", 2000))
+# Responses are counted by their JSON size, in memory they take about 2.5
+# times as much: 32 MB is ~80 MB per worker.
+RESPONSE_CACHE_MB = float(os.environ.get("RESPONSE_CACHE_MB", 32))
+# Share of RESPONSE_CACHE_MB each router's responses may hold,
+# e.g. "search=0.3,trending=0.15,recent=0.15,combo=0.4"
+RESPONSE_CACHE_BUDGETS = os.environ.get("RESPONSE_CACHE_BUDGETS", "")
+# memory (per worker), sqlite (shared by the workers of a host) or redis
+# (shared by every node)
+RESPONSE_CACHE_BACKEND = os.environ.get("RESPONSE_CACHE_BACKEND", "memory")
+RESPONSE_CACHE_PATH = os.environ.get(
+    "RESPONSE_CACHE_PATH", os.path.join(tempfile.gettempdir(), "torrent-api-cache.db")
+)
+RESPONSE_CACHE_REDIS_URL = os.environ.get(
+    "RESPONSE_CACHE_REDIS_URL", "redis://localhost:6379/0"
+)
+# Past its TTL a response is still served, refreshed in the background, for
+# this many more seconds; only then does a caller wait for the upstreams.
+RESPONSE_CACHE_STALE_TTL = int(os.environ.get("RESPONSE_CACHE_STALE_TTL", 86400))
+
+DEFAULT_BUDGETS = {"search": 0.3, "trending": 0.15, "recent": 0.15, "combo": 0.4}
+# Bookkeeping of an entry (key, record, index) besides the response itself
+ENTRY_OVERHEAD = 200
+
+
+def parse_budgets(value):
+    budgets = dict(DEFAULT_BUDGETS)
+    for item in value.split(","):
+        name, _, share = item.partition("=")
+        try:
+            budgets[name.strip()] = float(share)
+        except ValueError:
+            ...
+    return budgets
+
+
+def response_size(data):
+    if isinstance(data, Response):
+        return len(data.body)
+    try:
+        return len(json_dumps(data))
+    except TypeError:
+        return 0
+
+
+def encode_entry(value, stored_at, fresh_until):
+    """
+    A response as bytes for the shared backends: status code, when it was
+    stored and until when it is fresh, newline, JSON body.
+    """
+    if isinstance(value, Response):
+        status_code, body = value.status_code, bytes(value.body)
+    else:
+        status_code, body = 200, json_dumps(value)
+    return b"%d %.3f %.3f\n" % (status_code, stored_at, fresh_until) + body
+
+
+def decode_entry(blob):
+    """
+    Back from encode_entry: the data of a 200, the response otherwise.
+    """
+    header, _, body = bytes(blob).partition(b"\n")
+    status_code, stored_at, fresh_until = (header.split() + [b"0", b"0"])[:3]
+    if int(status_code) == 200:
+        value = orjson.loads(body)
+    else:
+        value = Response(
+            body, status_code=int(status_code), media_type="application/json"
+        )
+    return Entry(value, len(blob), float(stored_at), float(fresh_until), None)
+
+
+def entry_age(entry):
+    """
+    Seconds since the entry was stored, as sent in the Age header.
+    """
+    return max(int(time.time() - entry.stored_at), 0)
+
+
+def aged_response(entry):
+    """
+    A cached response with its Age header.
+    """
+    headers = {"Age": str(entry_age(entry))}
+    value = entry.value
+    if isinstance(value, Response):
+        return Response(
+            value.body,
+            status_code=value.status_code,
+            headers=headers,
+            media_type=value.media_type,
+        )
+    return FastJSONResponse(value, headers=headers)
+
+
+class Entry:
+    __slots__ = ("value", "size", "stored_at", "fresh_until", "expires_at")
+
+    def __init__(self, value, size, stored_at, fresh_until, expires_at):
+        self.value = value
+        self.size = size
+        self.stored_at = stored_at
+        self.fresh_until = fresh_until
+        self.expires_at = expires_at
+
+
+class CacheBackend:
+    """
+    Counters and namespaces every backend shares. Backends implement
+    load(name, key, count=True), returning an Entry (counted as a hit or
+    miss unless count is False), and store(name, key, value, ttl,
+    stored_at=None), coroutines. Entries are fresh for ttl seconds from
+    stored_at (now by default) and kept stale_ttl more.
+    """
+
+    def __init__(
+        self, max_entries, max_bytes, budgets, stale_ttl=RESPONSE_CACHE_STALE_TTL
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.budgets = budgets
+        self.stale_ttl = stale_ttl
+        self._hits = {}
+        self._misses = {}
+
+    def namespace(self, name, ttl=None):
+        self._hits.setdefault(name, 0)
+        self._misses.setdefault(name, 0)
+        return CacheNamespace(self, name, ttl)
+
+    def budget(self, name):
+        return self.max_bytes * self.budgets.get(name, 0.1)
+
+    def _count(self, name, entry, count=True):
+        if not count:
+            return entry
+        if entry is None:
+            self._misses[name] += 1
+        else:
+            self._hits[name] += 1
+        return entry
+
+    def hit_ratio(self, name):
+        lookups = self._hits[name] + self._misses[name]
+        return round(self._hits[name] / lookups, 3) if lookups else 0.0
+
+
+class ResponseCache(CacheBackend):
+    """
+    Route responses of every router, bounded in entries and in bytes.
+    Each namespace (router) has its own least recently used order and a
+    share of the bytes; a namespace over its share evicts its own oldest
+    entries, and past the global bounds the namespace furthest over its
+    share gives way first.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._entries = {}
+        self._bytes = {}
+        self.entries = 0
+        self.bytes = 0
+
+    def namespace(self, name, ttl=None):
+        self._entries.setdefault(name, OrderedDict())
+        self._bytes.setdefault(name, 0)
+        return super().namespace(name, ttl)
+
+    async def load(self, name, key, count=True):
+        return self._lookup(name, key, count)
+
+    async def store(self, name, key, value, ttl, stored_at=None):
+        self.set(name, key, value, ttl, stored_at)
+
+    def _lookup(self, name, key, count=True):
+        entries = self._entries[name]
+        entry = entries.get(key)
+        if entry is not None and entry.expires_at <= time.time():
+            self._drop(name, key)
+            entry = None
+        if entry is not None:
+            entries.move_to_end(key)
+        return self._count(name, entry, count)
+
+    def get(self, name, key):
+        entry = self._lookup(name, key)
+        return None if entry is None else entry.value
+
+    def set(self, name, key, value, ttl, stored_at=None):
+        self._drop(name, key)
+        size = response_size(value) + len(key) + ENTRY_OVERHEAD
+        if size > self.budget(name):
+            return
+        if stored_at is None:
+            stored_at = time.time()
+        self._entries[name][key] = Entry(
+            value, size, stored_at, stored_at + ttl, stored_at + ttl + self.stale_ttl
+        )
+        self._bytes[name] += size
+        self.bytes += size
+        self.entries += 1
+        while self._bytes[name] > self.budget(name):
+            self._drop(name, next(iter(self._entries[name])))
+        while self.entries > self.max_entries or self.bytes > self.max_bytes:
+            over = max(
+                (n for n in self._entries if self._entries[n]),
+                key=lambda n: self._bytes[n] / max(self.budget(n), 1),
+            )
+            self._drop(over, next(iter(self._entries[over])))
+
+    def _drop(self, name, key):
+        entry = self._entries[name].pop(key, None)
+        if entry is not None:
+            self._bytes[name] -= entry.size
+            self.bytes -= entry.size
+            self.entries -= 1
+
+    def clear(self):
+        for name in self._entries:
+            while self._entries[name]:
+                self._drop(name, next(iter(self._entries[name])))
+
+    def stats(self):
+        namespaces = {}
+        for name, entries in self._entries.items():
+            namespaces[name] = {
+                "entries": len(entries),
+                "mb": round(self._bytes[name] / 1024**2, 2),
+                "budget_mb": round(self.budget(name) / 1024**2, 2),
+                "hit_ratio": self.hit_ratio(name),
+            }
+        return {
+            "backend": "memory",
+            "entries": self.entries,
+            "mb": round(self.bytes / 1024**2, 2),
+            "namespaces": namespaces,
+        }
+
+
+class SqliteCache(CacheBackend):
+    """
+    Responses in a SQLite file, shared by the workers of a host. Same
+    bounds as the memory cache: a namespace over its share drops its least
+    recently used entries, past the global bounds the least recently used
+    of any namespace go.
+    """
+
+    def __init__(self, path, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.path = path
+        self._db = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        # Opened on first use, in the worker process that uses it.
+        if self._db is None:
+            db = sqlite3.connect(
+                self.path, timeout=5, isolation_level=None, check_same_thread=False
+            )
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS responses (namespace TEXT, key TEXT, "
+                "body BLOB, size INTEGER, expires_at REAL, used_at REAL, "
+                "PRIMARY KEY (namespace, key))"
+            )
+            self._db = db
+        return self._db
+
+    def _run(self, func, *args):
+        with self._lock:
+            return func(self._connect(), *args)
+
+    def _get(self, db, name, key):
+        row = db.execute(
+            "SELECT body, expires_at FROM responses WHERE namespace=? AND key=?",
+            (name, key),
+        ).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if row[1] <= now:
+            db.execute(
+                "DELETE FROM responses WHERE namespace=? AND key=?", (name, key)
+            )
+            return None
+        db.execute(
+            "UPDATE responses SET used_at=? WHERE namespace=? AND key=?",
+            (now, name, key),
+        )
+        return row[0]
+
+    def _set(self, db, name, key, blob, expires_at):
+        size = len(blob) + len(key) + ENTRY_OVERHEAD
+        now = time.time()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.execute("DELETE FROM responses WHERE expires_at<=?", (now,))
+            db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (name, key, blob, size, expires_at, now),
+            )
+            # Newest first, whatever no longer fits the namespace's share.
+            db.execute(
+                "DELETE FROM responses WHERE namespace=? AND key IN (SELECT key FROM "
+                "(SELECT key, SUM(size) OVER (ORDER BY used_at DESC, key) AS total "
+                "FROM responses WHERE namespace=?) WHERE total>?)",
+                (name, name, self.budget(name)),
+            )
+            db.execute(
+                "DELETE FROM responses WHERE rowid IN (SELECT rowid FROM "
+                "(SELECT rowid, SUM(size) OVER w AS total, ROW_NUMBER() OVER w AS n "
+                "FROM responses WINDOW w AS (ORDER BY used_at DESC, key)) "
+                "WHERE total>? OR n>?)",
+                (self.max_bytes, self.max_entries),
+            )
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    async def load(self, name, key, count=True):
+        try:
+            blob = await asyncio.to_thread(self._run, self._get, name, key)
+        except sqlite3.Error:
+            blob = None
+        return self._count(name, None if blob is None else decode_entry(blob), count)
+
+    async def store(self, name, key, value, ttl, stored_at=None):
+        if stored_at is None:
+            stored_at = time.time()
+        blob = encode_entry(value, stored_at, stored_at + ttl)
+        if len(blob) + len(key) + ENTRY_OVERHEAD > self.budget(name):
+            return
+        expires_at = stored_at + ttl + self.stale_ttl
+        try:
+            await asyncio.to_thread(self._run, self._set, name, key, blob, expires_at)
+        except sqlite3.Error:
+            ...
+
+    def _stats(self, db):
+        return db.execute(
+            "SELECT namespace, COUNT(*), SUM(size) FROM responses GROUP BY namespace"
+        ).fetchall()
+
+    def clear(self):
+        self._run(lambda db: db.execute("DELETE FROM responses"))
+
+    def stats(self):
+        try:
+            rows = {name: (count, size) for name, count, size in self._run(self._stats)}
+        except sqlite3.Error:
+            rows = {}
+        namespaces = {}
+        for name in self._hits:
+            count, size = rows.get(name, (0, 0))
+            namespaces[name] = {
+                "entries": count,
+                "mb": round(size / 1024**2, 2),
+                "budget_mb": round(self.budget(name) / 1024**2, 2),
+                "hit_ratio": self.hit_ratio(name),
+            }
+        return {
+            "backend": "sqlite",
+            "entries": sum(count for count, _ in rows.values()),
+            "mb": round(sum(size for _, size in rows.values()) / 1024**2, 2),
+            "namespaces": namespaces,
+        }
+
+
+class RedisCache(CacheBackend):
+    """
+    Responses in a Redis protocol server, shared by every node. Entries
+    expire there; the server's maxmemory policy (e.g. allkeys-lru) bounds
+    them instead of RESPONSE_CACHE_MB. An unreachable server is a miss.
+    """
+
+    def __init__(self, url, *args, prefix="torrent-api", **kwargs):
+        super().__init__(*args, **kwargs)
+        self.client = RespClient(url)
+        self.prefix = prefix
+
+    def _key(self, name, key):
+        return f"{self.prefix}:{name}:{key}"
+
+    async def load(self, name, key, count=True):
+        try:
+            blob = await self.client.execute("GET", self._key(name, key))
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, RespError):
+            blob = None
+        return self._count(name, None if blob is None else decode_entry(blob), count)
+
+    async def store(self, name, key, value, ttl, stored_at=None):
+        if stored_at is None:
+            stored_at = time.time()
+        blob = encode_entry(value, stored_at, stored_at + ttl)
+        if len(blob) + len(key) + ENTRY_OVERHEAD > self.budget(name):
+            return
+        hard_ttl = stored_at + ttl + self.stale_ttl - time.time()
+        try:
+            await self.client.execute(
+                "SET", self._key(name, key), blob, "PX", max(int(hard_ttl * 1000), 1)
+            )
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, RespError):
+            ...
+
+    def stats(self):
+        return {
+            "backend": "redis",
+            "namespaces": {
+                name: {"hit_ratio": self.hit_ratio(name)} for name in self._hits
+            },
+        }
+
+
+# Background refreshes of stale responses, referenced until they finish.
+_refreshes = set()
+
+# Background tasks still completing the response being computed (details=lazy
+# rows): once they are done the response is stored again, so the cache
+# accounts for (and the shared backends get) the completed rows.
+response_updates = contextvars.ContextVar("response_updates", default=None)
+
+
+def track_updates():
+    """
+    Starts collecting response_updates in the current context, returns
+    the list they are added to.
+    """
+    updates = []
+    response_updates.set(updates)
+    return updates
+
+
+class CacheNamespace:
+    """
+    One router's view of the response cache. ttl(data, expire), when
+    given, picks the lifetime of each stored response.
+    """
+
+    def __init__(self, cache, name, ttl=None):
+        self.cache = cache
+        self.name = name
+        self.ttl = ttl
+        # Concurrent misses on the same key share one fetch
+        self.flight = SingleFlight()
+
+    async def get(self, key):
+        entry = await self.cache.load(self.name, key)
+        return None if entry is None else entry.value
+
+    async def set(self, key, value, ttl=86400, updates=None):
+        """
+        Stores value, and stores it again once the updates (tasks still
+        completing it) are done.
+        """
+        stored_at = time.time()
+        await self.cache.store(self.name, key, value, self._ttl(value, ttl), stored_at)
+        if updates:
+            task = asyncio.ensure_future(
+                self._store_updated(key, value, ttl, stored_at, updates)
+            )
+            _refreshes.add(task)
+            task.add_done_callback(_refreshes.discard)
+
+    def _ttl(self, value, ttl):
+        return ttl if self.ttl is None else self.ttl(value, ttl)
+
+    async def _store_updated(self, key, value, ttl, stored_at, updates):
+        await asyncio.gather(*updates, return_exceptions=True)
+        entry = await self.cache.load(self.name, key, count=False)
+        # Evicted, expired or replaced by a newer fetch in the meantime: that
+        # stands. Otherwise the entry keeps its age and lifetime.
+        if entry is None or round(entry.stored_at, 3) != round(stored_at, 3):
+            return
+        await self.cache.store(
+            self.name, key, value, self._ttl(value, ttl), stored_at
+        )
+
+    async def cache_response(self, key: str, func, expire: int = 86400):
+        """
+        Caches the response for 24 hours (86400 seconds).
+        If data is available in cache, it returns cached data with its Age,
+        refreshing it in the background once those 24 hours are over
+        (until RESPONSE_CACHE_STALE_TTL more have passed, after which the
+        caller waits for new data as on a miss).
+        If not, fetches new data, stores in cache, and returns it.
+        Concurrent callers missing the same key wait for a single fetch.
+        """
+
+        async def fetch_and_store():
+            # Runs in its own task, the collected updates are this fetch's.
+            updates = track_updates()
+            data = await func()
+            await self.set(key, data, expire, updates)
+            return data
+
+        entry = await self.load(key, fetch_and_store)
+        if entry is not None:
+            return aged_response(entry)
+
+        return await self.flight.do(key, fetch_and_store)
+
+    async def load(self, key, fetch_and_store):
+        """
+        The cached entry of key (None on a miss). A stale one is still
+        returned and refreshed in the background with fetch_and_store, which
+        fetches and sets the response.
+        """
+        entry = await self.cache.load(self.name, key)
+        if entry is not None and entry.fresh_until <= time.time():
+            self._revalidate(key, fetch_and_store)
+        return entry
+
+    def _revalidate(self, key, fetch_and_store):
+        if self.flight.running(key):
+            return
+
+        async def refresh():
+            try:
+                await self.flight.do(key, fetch_and_store)
+            except Exception:
+                # The stale response keeps being served until it expires.
+                ...
+
+        task = asyncio.ensure_future(refresh())
+        _refreshes.add(task)
+        task.add_done_callback(_refreshes.discard)
+
+
+def make_cache(backend=RESPONSE_CACHE_BACKEND):
+    bounds = (
+        RESPONSE_CACHE_ENTRIES,
+        RESPONSE_CACHE_MB * 1024**2,
+        parse_budgets(RESPONSE_CACHE_BUDGETS),
+    )
+    if backend == "sqlite":
+        return SqliteCache(RESPONSE_CACHE_PATH, *bounds)
+    if backend == "redis":
+        return RedisCache(RESPONSE_CACHE_REDIS_URL, *bounds)
+    return ResponseCache(*bounds)
+
+
+response_cache = make_cache()
@@ -0,0 +1,50 @@
+import asyncio
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key.
+    The first caller starts the work, everyone arriving while it is still
+    running awaits the same task and gets the same result (or exception).
+    The work is only cancelled once every waiter has been cancelled.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._waiters = {}
+
+    async def do(self, key, func):
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            self._waiters[task] = 0
+            task.add_done_callback(lambda done: self._forget(key, done))
+        self._waiters[task] += 1
+        try:
+            # A cancelled waiter must not cancel the work the others are waiting on.
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.done() and self._waiters[task] == 1:
+                task.cancel()
+                # Late callers start fresh instead of joining a dying task.
+                if self._calls.get(key) is task:
+                    del self._calls[key]
+            raise
+        finally:
+            if task in self._waiters:
+                self._waiters[task] -= 1
+
+    def _forget(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        self._waiters.pop(task, None)
+        if not task.cancelled():
+            # Mark the exception as retrieved even if every waiter went away.
+            task.exception()
+
+    def running(self, key):
+        return key in self._calls
+
+    def in_flight(self):
+        return len(self._calls)
@@ -0,0 +1,54 @@
+import codecs
+
+STREAM_CHUNK_SIZE = 16 * 1024
+
+
+class StreamStop:
+    """
+    Tells a streaming fetch when a listing page has everything the parser
+    needs: more than `rows` occurrences of `row_marker` (so the first `rows`
+    rows are complete) or, when given, the `tail_marker` block (pagination)
+    that follows the rows, closed by `tail_end`.
+    """
+
+    def __init__(self, row_marker, rows, tail_marker=None, tail_end=None):
+        self.row_marker = row_marker
+        self.rows = rows
+        self.tail_marker = tail_marker
+        self.tail_end = tail_end
+
+    @property
+    def key(self):
+        return (self.row_marker, self.rows, self.tail_marker, self.tail_end)
+
+
+async def read_until(response, stop, encoding=None):
+    """
+    Reads a response body chunk by chunk and returns the decoded text as soon
+    as stop is satisfied, leaving the rest of the page unread. Returns
+    (text, stopped): stopped is True when the body was cut short.
+    """
+    decoder = codecs.getincrementaldecoder(encoding or response.charset or "utf-8")(
+        errors="replace"
+    )
+    text = ""
+    rows = 0
+    scanned = 0
+    tail_at = -1
+    overlap = max(len(stop.row_marker), len(stop.tail_marker or "")) - 1
+    async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+        text += decoder.decode(chunk)
+        start = max(0, scanned - overlap)
+        rows += text.count(stop.row_marker, start) - text.count(
+            stop.row_marker, start, scanned
+        )
+        if stop.tail_marker is not None and tail_at < 0:
+            tail_at = text.find(stop.tail_marker, start)
+        scanned = len(text)
+        if stop.tail_marker is None:
+            if rows > stop.rows:
+                return text, True
+        elif tail_at >= 0 and text.find(stop.tail_end, tail_at) >= 0:
+            # The tail follows the rows, once it is closed no row is missing.
+            return text, True
+    return text + decoder.decode(b"", final=True), False
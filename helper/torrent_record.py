@@ -0,0 +1,136 @@
+import re
+
+_UNITS = {
+    "B": 1,
+    "K": 1024,
+    "M": 1024**2,
+    "G": 1024**3,
+    "T": 1024**4,
+    "P": 1024**5,
+}
+_SIZE = re.compile(r"([\d.,]+)\s*([KMGTP]?)i?B", re.IGNORECASE)
+
+
+def to_int(value):
+    """
+    "1,234" -> 1234, None when the site did not give a number.
+    """
+    if value is None or isinstance(value, int):
+        return value
+    try:
+        return int(str(value).replace(",", "").strip())
+    except ValueError:
+        return None
+
+
+def size_to_bytes(size):
+    """
+    "1.4 GB", "885.6 MiB", "3 Mb" -> bytes. The sites all show binary
+    multiples, whatever their unit reads.
+    """
+    if not size:
+        return None
+    match = _SIZE.search(str(size).replace("\xa0", " "))
+    if match is None:
+        return None
+    try:
+        number = float(match.group(1).replace(",", ""))
+    except ValueError:
+        return None
+    return int(number * _UNITS[match.group(2).upper() or "B"])
+
+
+class Torrent:
+    """
+    One result row. The fields every site shares live in slots, counts as
+    ints and the size also in bytes; whatever else a site reports (files,
+    genre, a book's publisher, ...) is kept in extra. Unset fields are left
+    out of the response, so every site keeps the keys it always had.
+    """
+
+    __slots__ = (
+        "name",
+        "size",
+        "size_bytes",
+        "seeders",
+        "leechers",
+        "downloads",
+        "category",
+        "uploader",
+        "date",
+        "url",
+        "hash",
+        "magnet",
+        "torrent",
+        "poster",
+        "screenshot",
+        "extra",
+    )
+    _COUNTS = ("seeders", "leechers", "downloads")
+
+    def __init__(self, **fields):
+        for field in self.__slots__:
+            setattr(self, field, None)
+        self.update(fields)
+
+    @classmethod
+    def from_dict(cls, row):
+        return row if isinstance(row, cls) else cls(**row)
+
+    def update(self, fields):
+        for key, value in fields.items():
+            if key in self._COUNTS:
+                value = to_int(value)
+            if key not in self.__slots__ or key == "extra":
+                if self.extra is None:
+                    self.extra = {}
+                self.extra[key] = value
+                continue
+            setattr(self, key, value)
+            if key == "size":
+                self.size_bytes = size_to_bytes(value)
+
+    def to_dict(self):
+        row = {
+            field: getattr(self, field)
+            for field in self.__slots__[:-1]
+            if getattr(self, field) is not None
+        }
+        if self.extra:
+            row.update(self.extra)
+        return row
+
+    # Mapping protocol, so responses holding records serialize as before.
+    def keys(self):
+        return self.to_dict().keys()
+
+    def __getitem__(self, key):
+        if key not in self.__slots__ or key == "extra":
+            return (self.extra or {})[key]
+        value = getattr(self, key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __eq__(self, other):
+        if not isinstance(other, Torrent):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"Torrent({self.to_dict()!r})"
+
+
+def to_records(result):
+    """
+    Replaces the row dicts of a parsed result by Torrent records.
+    """
+    if result is not None and result.get("data"):
+        result["data"] = [Torrent.from_dict(row) for row in result["data"]]
+    return result
@@ -0,0 +1,310 @@
+import asyncio
+import math
+import os
+import time
+from .asyncioPoliciesFix import decorator_asyncio_fix
+from .detail_cache import detail_cache, VOLATILE
+from .html_scraper import Scraper
+from .mirrors import select_mirror
+from .parse_executor import run_parse_batched
+from .response_cache import response_updates
+from .torrent_record import Torrent, to_records
+
+# none: listing only. lazy: the listing is returned at once and its rows are
+# completed from their detail pages in the background (cached responses
+# hold the same rows, so later hits carry the details). full: rows are
+# completed before returning.
+DETAILS = ("none", "lazy", "full")
+
+# Background enrichments of lazy listings, referenced until they finish.
+_enrichments = set()
+
+# Upstream pages one listing may read to fill its limit, the first included
+LISTING_MAX_PAGES = int(os.environ.get("LISTING_MAX_PAGES", 5))
+
+
+def _row_key(obj):
+    return obj.get("url") or obj.get("magnet") or obj.get("name")
+
+
+def merge_detail(obj, detail):
+    """
+    Adds a detail page's fields to its row. Counts the listing has are
+    fresher than the (possibly cached) detail page's and are kept.
+    """
+    obj.update(
+        {
+            key: value
+            for key, value in detail.items()
+            if key not in VOLATILE or obj.get(key) is None
+        }
+    )
+
+
+class Route:
+    """
+    Where a listing lives on a site.
+    url is used without a category, category_url with one ({category} after
+    applying category_case and then the categories aliases). Placeholders:
+    {query}, {page}, {page0} (zero based page) and {category}. first_page
+    replaces url on page 1 for sites that reject an explicit first page.
+    args are passed on to the site's _parser (e.g. rows to skip).
+    """
+
+    def __init__(
+        self,
+        url,
+        category_url=None,
+        categories=None,
+        category_case=None,
+        args=(),
+        category_args=None,
+        first_page=None,
+    ):
+        self.url = url
+        self.category_url = category_url
+        self.categories = categories or {}
+        self.category_case = category_case
+        self.args = tuple(args)
+        self.category_args = (
+            self.args if category_args is None else tuple(category_args)
+        )
+        self.first_page = first_page
+
+    def build(self, base_url, page, query=None, category=None):
+        """
+        Returns the listing url and the parser arguments.
+        """
+        if category and self.category_url is not None:
+            if self.category_case is not None:
+                category = getattr(str(category), self.category_case)()
+            category = self.categories.get(category, category)
+            template, args = self.category_url, self.category_args
+        elif page == 1 and self.first_page is not None:
+            template, args = self.first_page, self.args
+        else:
+            template, args = self.url, self.args
+        path = template.format(
+            query=query, page=page, page0=page - 1, category=category
+        )
+        return base_url + path, args
+
+
+class TorrentSite:
+    """
+    Shared engine of the scrapers. A site declares its default domain
+    (BASE), a Route per listing (SEARCH, TRENDING, RECENT), how its pages
+    are parsed (_parser, and _parse_detail when rows are completed from
+    their detail page) and optionally _stream_stop; fetching, parsing off
+    the loop, detail enrichment, conversion of the rows to Torrent records
+    and timing are done here for every site.
+    """
+
+    _name = None
+    _regions = None
+    BASE = None
+    SEARCH = None
+    TRENDING = None
+    RECENT = None
+    _parse_detail = None
+    # Rows on a full listing page, for sites whose pages do not say how many
+    # there are (total_pages).
+    PAGE_ROWS = None
+
+    def __init__(self):
+        self.BASE_URL = select_mirror(self.BASE)
+        self.LIMIT = None
+        self.DETAILS = "full"
+
+    async def search(self, query, page, limit, details="full"):
+        return await self._listing(
+            self.SEARCH, page, limit, details, query=self._query(query)
+        )
+
+    async def trending(self, category, page, limit, details="full"):
+        return await self._listing(
+            self.TRENDING, page, limit, details, category=category
+        )
+
+    async def recent(self, category, page, limit, details="full"):
+        return await self._listing(self.RECENT, page, limit, details, category=category)
+
+    async def _listing(self, route, page, limit, details, query=None, category=None):
+        async with Scraper.session() as session:
+            start_time = time.time()
+            self.LIMIT = limit
+            self.DETAILS = details
+            url, args = route.build(self.BASE_URL, page, query, category)
+            next_url, _ = route.build(self.BASE_URL, page + 1, query, category)
+            if next_url == url:
+                return await self.parser_result(start_time, url, session, *args)
+            return await self._paged_result(
+                start_time, session, page, args,
+                lambda page: route.build(self.BASE_URL, page, query, category)[0],
+            )
+
+    async def get_torrent_by_url(self, torrent_url):
+        """
+        One torrent from its detail page, for sites whose rows are completed
+        from it (details_available).
+        """
+        async with Scraper.session() as session:
+            start_time = time.time()
+            detail = await self._fetch_detail(session, torrent_url)
+            if not detail:
+                return None
+            return {
+                "data": [Torrent(**{"url": torrent_url, **detail})],
+                "time": time.time() - start_time,
+                "total": 1,
+            }
+
+    def _query(self, query):
+        return query
+
+    def _stream_stop(self, url):
+        return None
+
+    async def _get_pages(self, session, url):
+        return await Scraper().get_all_results(
+            session, url, stop=self._stream_stop(url)
+        )
+
+    async def _parse_page(self, session, url, args, parser=None):
+        """
+        A listing page's result and detail urls (None without details).
+        """
+        htmls = await self._get_pages(session, url)
+        result = await Scraper().parse(parser or self._parser, htmls, *args)
+        if self._parse_detail is not None and parser is None:
+            return result
+        return result, None
+
+    def _pages_after(self, page, first):
+        """
+        How many pages after page are needed to fill LIMIT, from the first
+        page's rows and total_pages (or PAGE_ROWS when the site does not
+        report it).
+        """
+        rows = len(first["data"])
+        if not self.LIMIT or rows == 0 or rows >= self.LIMIT:
+            return 0
+        total_pages = first.get("total_pages")
+        if isinstance(total_pages, int):
+            left = total_pages - page
+        elif self.PAGE_ROWS and rows >= self.PAGE_ROWS:
+            left = LISTING_MAX_PAGES
+        else:
+            return 0
+        per_page = max(rows, self.PAGE_ROWS or 0)
+        needed = math.ceil((self.LIMIT - rows) / per_page)
+        return max(min(needed, left, LISTING_MAX_PAGES - 1), 0)
+
+    async def _paged_result(self, start_time, session, page, args, page_url):
+        """
+        Fills LIMIT from as many listing pages as needed: after the first
+        one, the missing pages are fetched concurrently and merged in page
+        order, rows listed twice (the listing moved in between) dropped.
+        Details are then fetched for the kept rows only.
+        """
+        result, urls = await self._parse_page(session, page_url(page), args)
+        if result is None:
+            return None
+        count = self._pages_after(page, result)
+        if count:
+            pages = await asyncio.gather(
+                *[
+                    self._parse_page(session, page_url(page + i), args)
+                    for i in range(1, count + 1)
+                ],
+                return_exceptions=True,
+            )
+            seen = {_row_key(obj) for obj in result["data"]}
+            if urls is not None:
+                urls = list(urls)
+            for page_result in pages:
+                if isinstance(page_result, BaseException):
+                    continue
+                res, more_urls = page_result
+                if res is None or len(res["data"]) == 0:
+                    continue
+                for obj in res["data"]:
+                    key = _row_key(obj)
+                    if key is None or key not in seen:
+                        seen.add(key)
+                        result["data"].append(obj)
+                if urls is not None and more_urls:
+                    urls.extend(more_urls)
+                if "current_page" in res:
+                    result["current_page"] = res["current_page"]
+            result["data"] = result["data"][: self.LIMIT]
+        return await self._complete(start_time, session, result, urls)
+
+    async def parser_result(self, start_time, url, session, *args, parser=None):
+        result, urls = await self._parse_page(session, url, args, parser)
+        return await self._complete(start_time, session, result, urls)
+
+    async def _complete(self, start_time, session, result, urls):
+        if urls is not None:
+            if result is not None and self.DETAILS == "full":
+                result = await self._get_torrent(result, session, urls)
+            elif result is not None and self.DETAILS == "lazy":
+                self._get_torrent_later(to_records(result), session, urls)
+        if result is not None:
+            to_records(result)
+            result["time"] = time.time() - start_time
+            result["total"] = len(result["data"])
+        return result
+
+    @decorator_asyncio_fix
+    async def _fetch_detail(self, session, url, infohash=None):
+        """
+        What url's detail page adds to its row, from the detail cache when
+        the page was parsed before (under this url or infohash).
+        """
+        detail = detail_cache.get(self._name, url, infohash)
+        if detail is not None:
+            return detail
+        try:
+            html = await Scraper()._get_html(
+                session, url, encoding="ISO-8859-1", revalidate=False
+            )
+            detail = await run_parse_batched(self._parse_detail, html)
+        except:
+            return None
+        if detail:
+            detail_cache.set(self._name, url, detail)
+        return detail
+
+    async def _individual_scrap(self, session, url, obj):
+        detail = await self._fetch_detail(session, url)
+        if detail:
+            merge_detail(obj, detail)
+
+    async def _get_torrent(self, result, session, urls):
+        # Rows by url, built once: one detail request per distinct url,
+        # applied to every row listing it.
+        rows = {}
+        for obj in result["data"]:
+            rows.setdefault(obj["url"], []).append(obj)
+        urls = [url for url in dict.fromkeys(urls) if url in rows]
+        details = await asyncio.gather(
+            *[
+                self._fetch_detail(session, url, rows[url][0].get("hash"))
+                for url in urls
+            ]
+        )
+        for url, detail in zip(urls, details):
+            if detail:
+                for obj in rows[url]:
+                    merge_detail(obj, detail)
+        return result
+
+    def _get_torrent_later(self, result, session, urls):
+        task = asyncio.create_task(self._get_torrent(result, session, urls))
+        _enrichments.add(task)
+        task.add_done_callback(_enrichments.discard)
+        updates = response_updates.get()
+        if updates is not None:
+            # The cached response holding these rows is stored again after.
+            updates.append(task)
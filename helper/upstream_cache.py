@@ -0,0 +1,109 @@
+import os
+import copy
+from collections import OrderedDict
+
+UPSTREAM_CACHE_ENTRIES = int(os.environ.get("UPSTREAM_CACHE_ENTRIES", 512))
+# Page bodies kept for revalidation, per worker
+UPSTREAM_CACHE_MB = float(os.environ.get("UPSTREAM_CACHE_MB", 8))
+PARSED_CACHE_ENTRIES = int(os.environ.get("PARSED_CACHE_ENTRIES", 256))
+
+
+class LRU:
+    """
+    Minimal least recently used mapping with a fixed number of entries and,
+    given size(value), a bound on their total size.
+    """
+
+    def __init__(self, max_entries, max_bytes=None, size=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = size
+        self.bytes = 0
+        self._data = OrderedDict()
+
+    def get(self, key):
+        value = self._data.get(key)
+        if value is not None:
+            self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        self._pop(key)
+        if self.size is not None:
+            size = self.size(value)
+            if size > self.max_bytes:
+                return
+            self.bytes += size
+        self._data[key] = value
+        while len(self._data) > self.max_entries or (
+            self.size is not None and self.bytes > self.max_bytes
+        ):
+            self._pop(next(iter(self._data)))
+
+    def _pop(self, key):
+        value = self._data.pop(key, None)
+        if value is not None and self.size is not None:
+            self.bytes -= self.size(value)
+
+    def __len__(self):
+        return len(self._data)
+
+
+# (url, encoding) -> {"etag", "last_modified", "body"} for conditional
+# requests of listing pages (detail pages are kept parsed, in detail_cache)
+validators = LRU(
+    UPSTREAM_CACHE_ENTRIES,
+    UPSTREAM_CACHE_MB * 1024**2,
+    # str length, near enough to bytes for the mostly ASCII pages
+    lambda entry: len(entry["body"] or ""),
+)
+# parser + page content -> parsed result, so a 304 also skips parsing
+parsed_results = LRU(PARSED_CACHE_ENTRIES)
+
+
+def conditional_headers(entry):
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def store_validators(key, response_headers, body):
+    etag = response_headers.get("ETag")
+    last_modified = response_headers.get("Last-Modified")
+    if etag or last_modified:
+        validators.set(
+            key, {"etag": etag, "last_modified": last_modified, "body": body}
+        )
+
+
+def parse_key(parser, htmls, args):
+    """
+    Identifies a parser run by site, parser, settings and page content.
+    """
+    site = parser.__self__
+    return (
+        type(site).__name__,
+        parser.__name__,
+        site.BASE_URL,
+        site.LIMIT,
+        args,
+        # hash and length instead of the page itself to keep entries small
+        tuple((hash(html), len(html or "")) for html in htmls),
+    )
+
+
+def cached_parse(key):
+    """
+    Result of an earlier run on the same page content, deep copied since
+    callers enrich results in place.
+    """
+    result = parsed_results.get(key)
+    return copy.deepcopy(result) if result is not None else None
+
+
+def store_parse(key, result):
+    if result is not None and result != (None, None):
+        parsed_results.set(key, copy.deepcopy(result))
@@ -1,6 +1,7 @@
 import uvicorn
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, Depends
-from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from routers.v1.search_router import router as search_router
 from routers.v1.trending_router import router as trending_router
@@ -10,14 +11,38 @@ from routers.v1.combo_routers import router as combo_router
 from routers.v1.sites_list_router import router as site_list_router
 from routers.home_router import router as home_router
 from routers.v1.search_url_router import router as search_url_router
+from routers.v1.details_router import router as details_router
 from helper.uptime import getUptime
+from helper.error_messages import FastJSONResponse
 from helper.dependencies import authenticate_request
+from helper.html_scraper import get_session, close_session, warm_up
+from helper.mirrors import probe_mirrors
+from helper.dns_cache import refresh_dns
+from helper.parse_executor import shutdown_executor
+from helper.detail_cache import detail_cache
+from helper.response_cache import response_cache
+from constants.base_url import MIRRORS
 from mangum import Mangum
 from math import ceil
 import time
 
 startTime = time.time()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open the pooled upstream session up front and release it on shutdown.
+    session = get_session()
+    await warm_up(session, [m for mirrors in MIRRORS.values() for m in mirrors])
+    prober = asyncio.create_task(probe_mirrors(session))
+    dns_refresher = asyncio.create_task(refresh_dns())
+    yield
+    prober.cancel()
+    dns_refresher.cancel()
+    await close_session()
+    shutdown_executor()
+
+
 app = FastAPI(
     title="Torrent-Api-Py",
     version="1.0.1",
@@ -28,6 +53,8 @@ app = FastAPI(
         "url": "https://github.com/ryuk-me",
         "email": "neerajkr1210@gmail.com",
     },
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
 origins = ["*"]
@@ -47,12 +74,14 @@ async def health_route(req: Request):
     Health Route : Returns App details.
 
     """
-    return JSONResponse(
+    return FastJSONResponse(
         {
             "app": "Torrent-Api-Py",
             "version": "v" + "1.0.1",
             "ip": req.client.host,
             "uptime": ceil(getUptime(startTime)),
+            "detail_cache": detail_cache.stats(),
+            "response_cache": response_cache.stats(),
         }
     )
 
@@ -64,6 +93,7 @@ app.include_router(recent_router, prefix="/api/v1/recent", dependencies=[Depends
 app.include_router(combo_router, prefix="/api/v1/all", dependencies=[Depends(authenticate_request)])
 app.include_router(site_list_router, prefix="/api/v1/sites", dependencies=[Depends(authenticate_request)])
 app.include_router(search_url_router, prefix="/api/v1/search_url", dependencies=[Depends(authenticate_request)])
+app.include_router(details_router, prefix="/api/v1/details", dependencies=[Depends(authenticate_request)])
 app.include_router(home_router, prefix="")
 
 handler = Mangum(app)
@@ -2,7 +2,8 @@ from fastapi import APIRouter
 from fastapi import status
 from typing import Optional
 from helper.is_site_available import check_if_site_available
-from helper.error_messages import error_handler
+from helper.error_messages import error_handler, json_response
+from helper.circuit_breaker import call_site, CircuitOpenError
 
 router = APIRouter(tags=["Category Torrents Route"])
 
@@ -36,9 +37,21 @@ async def get_category(
                         "available_categories": all_sites[site]["categories"],
                     },
                 )
-            resp = await all_sites[site]["website"]().search_by_category(
-                query, category, page, limit
-            )
+            try:
+                resp = await call_site(
+                    site,
+                    all_sites[site]["website"]().search_by_category(
+                        query, category, page, limit
+                    ),
+                )
+            except CircuitOpenError as e:
+                return error_handler(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    json_message={
+                        "error": "Site temporarily unavailable.",
+                        "retry_in": round(e.retry_in),
+                    },
+                )
             if resp is None:
                 return error_handler(
                     status_code=status.HTTP_403_FORBIDDEN,
@@ -47,7 +60,7 @@ async def get_category(
                     },
                 )
             elif len(resp["data"]) > 0:
-                return resp
+                return json_response(resp)
             else:
                 return error_handler(
                     status_code=status.HTTP_404_NOT_FOUND,
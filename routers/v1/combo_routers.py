@@ -1,52 +1,125 @@
-from fastapi import APIRouter, status
-from typing import Optional
+import os
+from fastapi import APIRouter, Request, status
+from fastapi.responses import StreamingResponse
+from typing import Literal, Optional
 from helper.is_site_available import check_if_site_available
+import json
 import time
 import asyncio
-from helper.error_messages import error_handler
-from aiocache import SimpleMemoryCache
+from helper.error_messages import error_handler, json_response, json_dumps
+from helper.circuit_breaker import call_site, CircuitOpenError
+from helper.response_cache import response_cache, track_updates, entry_age
 
 router = APIRouter(tags=["Combo Routes"])
 
-# Initialize cache
-cache = SimpleMemoryCache()
+# Deadline for a whole combo request and the budget of each site in it
+COMBO_TIMEOUT_MS = int(os.environ.get("COMBO_TIMEOUT_MS", 10000))
+SITE_TIMEOUT_MS = int(os.environ.get("SITE_TIMEOUT_MS", COMBO_TIMEOUT_MS))
+# Responses missing timed out sites are only cached briefly
+PARTIAL_RESULT_TTL = int(os.environ.get("PARTIAL_RESULT_TTL", 300))
 
-async def cache_response(key: str, func, expire: int = 86400):
+
+def response_ttl(data, expire):
     """
-    Caches the response for 24 hours (86400 seconds).
-    If data is available in cache, it returns cached data.
-    If not, fetches new data, stores in cache, and returns it.
+    Responses missing sites (timed out, circuit open) or answering 503/504
+    are kept PARTIAL_RESULT_TTL instead of expire.
     """
-    cached_data = await cache.get(key)
-    if cached_data:
-        return cached_data
+    if (
+        isinstance(data, dict) and (data.get("timed_out") or data.get("skipped"))
+    ) or getattr(data, "status_code", None) in (
+        status.HTTP_503_SERVICE_UNAVAILABLE,
+        status.HTTP_504_GATEWAY_TIMEOUT,
+    ):
+        return min(expire, PARTIAL_RESULT_TTL)
+    return expire
 
-    data = await func()
-    await cache.set(key, data, ttl=expire)  # Store with 24-hour expiry
-    return data
 
-async def fetch_search_results(query: str, limit: int):
-    start_time = time.time()
-    query = query.lower()
-    all_sites = check_if_site_available("1337x")
-    sites_list = list(all_sites.keys())
-    tasks = []
-    COMBO = {"data": []}
-    total_torrents_overall = 0
+# This router's share of the response cache
+cache = response_cache.namespace("combo", ttl=response_ttl)
 
-    for site in sites_list:
-        limit = (
-            all_sites[site]["limit"]
-            if limit == 0 or limit > all_sites[site]["limit"]
-            else limit
-        )
-        tasks.append(
-            asyncio.create_task(
-                all_sites[site]["website"]().search(query, page=1, limit=limit)
+
+def deadline_ms(timeout_ms: Optional[int]):
+    return COMBO_TIMEOUT_MS if timeout_ms is None else max(timeout_ms, 1)
+
+
+def site_limit(site_info, limit):
+    return site_info["limit"] if limit == 0 or limit > site_info["limit"] else limit
+
+
+async def iter_sites(calls, timeout_ms):
+    """
+    Runs each site's coroutine concurrently within the request deadline and
+    yields (site, status, result) as each one finishes, status being "ok",
+    "timed_out" (still running at the deadline or past its own budget, it
+    is cancelled), "skipped" (circuit open) or "failed".
+    """
+    timeout_ms = deadline_ms(timeout_ms)
+    budget = min(timeout_ms, SITE_TIMEOUT_MS) / 1000
+    tasks = {
+        asyncio.create_task(asyncio.wait_for(call_site(site, coro), budget)): site
+        for site, coro in calls
+    }
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout_ms / 1000
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending,
+                timeout=max(deadline - loop.time(), 0),
+                return_when=asyncio.FIRST_COMPLETED,
             )
-        )
+            if not done:
+                break
+            for task in done:
+                try:
+                    yield tasks[task], "ok", task.result()
+                except asyncio.TimeoutError:
+                    yield tasks[task], "timed_out", None
+                except CircuitOpenError:
+                    yield tasks[task], "skipped", None
+                except Exception:
+                    yield tasks[task], "failed", None
+        for task in pending:
+            yield tasks[task], "timed_out", None
+    finally:
+        for task in pending:
+            # Not awaited, the response must not wait for slow cancellations.
+            task.cancel()
+
+
+async def gather_sites(calls, timeout_ms, on_outcome=None):
+    """
+    Runs each site's coroutine concurrently within the request deadline.
+    Sites still running at the deadline (or past their own budget) are
+    cancelled and reported in timed_out instead of holding up the response.
+    Sites whose circuit is open are not called and reported in skipped.
+    on_outcome, when given, is called with each (site, status, result) as
+    it finishes.
+    """
+    order = [site for site, _ in calls]
+    finished = {}
+    timed_out = []
+    skipped = []
+    async for site, outcome, result in iter_sites(calls, timeout_ms):
+        if on_outcome is not None:
+            on_outcome((site, outcome, result))
+        if outcome == "ok":
+            finished[site] = result
+        elif outcome == "timed_out":
+            timed_out.append(site)
+        elif outcome == "skipped":
+            skipped.append(site)
+    # In site order, whatever order they finished in.
+    results = [finished[site] for site in order if site in finished]
+    timed_out.sort(key=order.index)
+    skipped.sort(key=order.index)
+    return results, timed_out, skipped
+
 
-    results = await asyncio.gather(*tasks)
+def combine_results(results, timed_out, skipped, start_time):
+    COMBO = {"data": []}
+    total_torrents_overall = 0
     for res in results:
         if res and len(res["data"]) > 0:
             COMBO["data"].extend(res["data"])
@@ -54,8 +127,20 @@ async def fetch_search_results(query: str, limit: int):
 
     COMBO["time"] = time.time() - start_time
     COMBO["total"] = total_torrents_overall
+    COMBO["timed_out"] = timed_out
+    COMBO["skipped"] = skipped
 
     if total_torrents_overall == 0:
+        if timed_out:
+            return error_handler(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                json_message={"error": "Sites timed out.", "timed_out": timed_out},
+            )
+        if skipped:
+            return error_handler(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                json_message={"error": "Sites temporarily unavailable.", "skipped": skipped},
+            )
         return error_handler(
             status_code=status.HTTP_404_NOT_FOUND,
             json_message={"error": "Result not found."},
@@ -63,103 +148,288 @@ async def fetch_search_results(query: str, limit: int):
 
     return COMBO
 
-@router.get("/search")
-async def get_search_combo(query: str, limit: Optional[int] = 0):
-    cache_key = f"search:{query}:{limit}"
-    return await cache_response(cache_key, lambda: fetch_search_results(query, limit))
+def stream_format(request: Request, stream: bool):
+    """
+    "sse" or "ndjson" when the client asked for a stream (Accept header or
+    ?stream=1), None for a single JSON body.
+    """
+    accept = request.headers.get("accept", "")
+    if "text/event-stream" in accept:
+        return "sse"
+    if "application/x-ndjson" in accept or stream:
+        return "ndjson"
+    return None
 
 
-async def fetch_trending_results(limit: int):
-    start_time = time.time()
-    all_sites = check_if_site_available("1337x")
-    sites_list = [
-        site
-        for site in all_sites.keys()
-        if all_sites[site]["trending_available"] and all_sites[site]["website"]
-    ]
-    tasks = []
-    COMBO = {"data": []}
-    total_torrents_overall = 0
+def encode_event(fmt: str, event: str, payload: dict):
+    if fmt == "sse":
+        return b"event: " + event.encode() + b"\ndata: " + json_dumps(payload) + b"\n\n"
+    return json_dumps({"event": event, **payload}) + b"\n"
 
-    for site in sites_list:
-        limit = (
-            all_sites[site]["limit"]
-            if limit == 0 or limit > all_sites[site]["limit"]
-            else limit
-        )
-        tasks.append(
-            asyncio.create_task(
-                all_sites[site]["website"]().trending(
-                    category=None, page=1, limit=limit
-                )
-            )
+
+def error_summary(response):
+    """
+    The summary fields of a combo answered with an error response.
+    """
+    return {**json.loads(response.body), "status": response.status_code}
+
+
+def result_events(fmt: str, combo, start_time: float, **summary):
+    """
+    A whole combo result (cached or fetched for another caller) as a
+    single rows event and its summary, an error response as the summary
+    alone.
+    """
+    if not isinstance(combo, dict):
+        yield encode_event(
+            fmt,
+            "summary",
+            {"total": 0, "time": time.time() - start_time, **error_summary(combo), **summary},
         )
+        return
+    yield encode_event(fmt, "rows", {"data": combo["data"]})
+    yield encode_event(
+        fmt,
+        "summary",
+        {
+            "total": combo["total"],
+            "time": time.time() - start_time,
+            "timed_out": combo["timed_out"],
+            "skipped": combo["skipped"],
+            **summary,
+        },
+    )
 
-    results = await asyncio.gather(*tasks)
-    for res in results:
-        if res and len(res["data"]) > 0:
-            COMBO["data"].extend(res["data"])
-            total_torrents_overall += res["total"]
 
-    COMBO["time"] = time.time() - start_time
-    COMBO["total"] = total_torrents_overall
+def stream_response(fmt: str, key: str, calls, timeout_ms: Optional[int]):
+    """
+    Sends each site's rows as soon as that site answers ("rows" events),
+    then a "summary" event with the totals, so the first rows arrive with
+    the fastest site instead of the slowest. The merged result is cached
+    like a regular response; a cached one is sent as a single rows event,
+    its age in the summary, and refreshed in the background once stale.
+    Concurrent misses on a key, streamed or not, share one fetch: callers
+    joining another's are sent its result once it is complete.
+    calls is a function returning the (site, coroutine) pairs, only called
+    once streaming starts.
+    """
 
-    if total_torrents_overall == 0:
-        return error_handler(
-            status_code=status.HTTP_404_NOT_FOUND,
-            json_message={"error": "Result not found."},
+    async def fetch_and_store(outcomes=None):
+        # As cache_response does it, each site's outcome also put on
+        # outcomes when a stream is waiting for them.
+        updates = track_updates()
+        start_time = time.time()
+        results, timed_out, skipped = await gather_sites(
+            calls(), timeout_ms, None if outcomes is None else outcomes.put_nowait
         )
+        combo = combine_results(results, timed_out, skipped, start_time)
+        await cache.set(key, combo, updates=updates)
+        return combo
 
-    return COMBO
+    async def events():
+        start_time = time.time()
+        entry = await cache.load(key, fetch_and_store)
+        if entry is not None:
+            for event in result_events(
+                fmt, entry.value, start_time, cached=True, age=entry_age(entry)
+            ):
+                yield event
+            return
 
-@router.get("/trending")
-async def get_all_trending(limit: Optional[int] = 0):
-    cache_key = f"trending:{limit}"
-    return await cache_response(cache_key, lambda: fetch_trending_results(limit))
+        outcomes = asyncio.Queue()
+        fetch = asyncio.ensure_future(
+            cache.flight.do(key, lambda: fetch_and_store(outcomes))
+        )
+        # Ends the outcomes, none at all when another caller's fetch ran.
+        fetch.add_done_callback(lambda _: outcomes.put_nowait(None))
+        received = False
+        timed_out = []
+        skipped = []
+        sites = {}
+        try:
+            while True:
+                outcome = await outcomes.get()
+                if outcome is None:
+                    break
+                received = True
+                site, status_, result = outcome
+                if status_ == "timed_out":
+                    timed_out.append(site)
+                elif status_ == "skipped":
+                    skipped.append(site)
+                elif status_ == "ok" and result and len(result["data"]) > 0:
+                    sites[site] = {
+                        "total": result["total"],
+                        "time": time.time() - start_time,
+                    }
+                    yield encode_event(
+                        fmt,
+                        "rows",
+                        {"site": site, "data": result["data"], **sites[site]},
+                    )
+            combo = fetch.result()
+        finally:
+            # A client gone away leaves the fetch to the callers sharing it.
+            fetch.cancel()
+        if not received:
+            for event in result_events(fmt, combo, start_time):
+                yield event
+            return
+        yield encode_event(
+            fmt,
+            "summary",
+            {
+                "total": sum(site["total"] for site in sites.values()),
+                "time": time.time() - start_time,
+                "timed_out": timed_out,
+                "skipped": skipped,
+                "sites": sites,
+                **({} if isinstance(combo, dict) else error_summary(combo)),
+            },
+        )
+
+    media_type = "text/event-stream" if fmt == "sse" else "application/x-ndjson"
+    return StreamingResponse(
+        events(), media_type=media_type, headers={"Cache-Control": "no-cache"}
+    )
+
+
+def search_calls(query: str, limit: int, details: str = "full"):
+    all_sites = check_if_site_available("1337x")
+    sites_list = list(all_sites.keys())
 
+    return [
+        (
+            site,
+            all_sites[site]["website"]().search(
+                query,
+                page=1,
+                limit=site_limit(all_sites[site], limit),
+                details=details,
+            ),
+        )
+        for site in sites_list
+    ]
 
-async def fetch_recent_results(limit: int):
+async def fetch_search_results(
+    query: str, limit: int, timeout_ms: Optional[int] = None, details: str = "full"
+):
     start_time = time.time()
+    calls = search_calls(query.lower(), limit, details)
+    results, timed_out, skipped = await gather_sites(calls, timeout_ms)
+    return combine_results(results, timed_out, skipped, start_time)
+
+@router.get("/search")
+async def get_search_combo(
+    request: Request,
+    query: str,
+    limit: Optional[int] = 0,
+    timeout_ms: Optional[int] = None,
+    details: Literal["none", "lazy", "full"] = "full",
+    stream: bool = False,
+):
+    # Per deadline: a result cut short by one caller's timeout_ms must not
+    # answer (or be refreshed for) callers with another.
+    cache_key = f"search:{query}:{limit}:{details}:{deadline_ms(timeout_ms)}"
+    fmt = stream_format(request, stream)
+    if fmt:
+        return stream_response(
+            fmt, cache_key, lambda: search_calls(query.lower(), limit, details), timeout_ms
+        )
+    return json_response(await cache.cache_response(cache_key, lambda: fetch_search_results(query, limit, timeout_ms, details)))
+
+
+def trending_calls(limit: int, details: str = "full"):
     all_sites = check_if_site_available("1337x")
     sites_list = [
         site
         for site in all_sites.keys()
-        if all_sites[site]["recent_available"] and all_sites[site]["website"]
+        if all_sites[site]["trending_available"] and all_sites[site]["website"]
     ]
-    tasks = []
-    COMBO = {"data": []}
-    total_torrents_overall = 0
 
-    for site in sites_list:
-        limit = (
-            all_sites[site]["limit"]
-            if limit == 0 or limit > all_sites[site]["limit"]
-            else limit
+    return [
+        (
+            site,
+            all_sites[site]["website"]().trending(
+                category=None,
+                page=1,
+                limit=site_limit(all_sites[site], limit),
+                details=details,
+            ),
         )
-        tasks.append(
-            asyncio.create_task(
-                all_sites[site]["website"]().recent(category=None, page=1, limit=limit)
-            )
+        for site in sites_list
+    ]
+
+async def fetch_trending_results(
+    limit: int, timeout_ms: Optional[int] = None, details: str = "full"
+):
+    start_time = time.time()
+    calls = trending_calls(limit, details)
+    results, timed_out, skipped = await gather_sites(calls, timeout_ms)
+    return combine_results(results, timed_out, skipped, start_time)
+
+@router.get("/trending")
+async def get_all_trending(
+    request: Request,
+    limit: Optional[int] = 0,
+    timeout_ms: Optional[int] = None,
+    details: Literal["none", "lazy", "full"] = "full",
+    stream: bool = False,
+):
+    # Per deadline: a result cut short by one caller's timeout_ms must not
+    # answer (or be refreshed for) callers with another.
+    cache_key = f"trending:{limit}:{details}:{deadline_ms(timeout_ms)}"
+    fmt = stream_format(request, stream)
+    if fmt:
+        return stream_response(
+            fmt, cache_key, lambda: trending_calls(limit, details), timeout_ms
         )
+    return json_response(await cache.cache_response(cache_key, lambda: fetch_trending_results(limit, timeout_ms, details)))
 
-    results = await asyncio.gather(*tasks)
-    for res in results:
-        if res and len(res["data"]) > 0:
-            COMBO["data"].extend(res["data"])
-            total_torrents_overall += res["total"]
 
-    COMBO["time"] = time.time() - start_time
-    COMBO["total"] = total_torrents_overall
+def recent_calls(limit: int, details: str = "full"):
+    all_sites = check_if_site_available("1337x")
+    sites_list = [
+        site
+        for site in all_sites.keys()
+        if all_sites[site]["recent_available"] and all_sites[site]["website"]
+    ]
 
-    if total_torrents_overall == 0:
-        return error_handler(
-            status_code=status.HTTP_404_NOT_FOUND,
-            json_message={"error": "Result not found."},
+    return [
+        (
+            site,
+            all_sites[site]["website"]().recent(
+                category=None,
+                page=1,
+                limit=site_limit(all_sites[site], limit),
+                details=details,
+            ),
         )
+        for site in sites_list
+    ]
 
-    return COMBO
+async def fetch_recent_results(
+    limit: int, timeout_ms: Optional[int] = None, details: str = "full"
+):
+    start_time = time.time()
+    calls = recent_calls(limit, details)
+    results, timed_out, skipped = await gather_sites(calls, timeout_ms)
+    return combine_results(results, timed_out, skipped, start_time)
 
 @router.get("/recent")
-async def get_all_recent(limit: Optional[int] = 0):
-    cache_key = f"recent:{limit}"
-    return await cache_response(cache_key, lambda: fetch_recent_results(limit))
+async def get_all_recent(
+    request: Request,
+    limit: Optional[int] = 0,
+    timeout_ms: Optional[int] = None,
+    details: Literal["none", "lazy", "full"] = "full",
+    stream: bool = False,
+):
+    # Per deadline: a result cut short by one caller's timeout_ms must not
+    # answer (or be refreshed for) callers with another.
+    cache_key = f"recent:{limit}:{details}:{deadline_ms(timeout_ms)}"
+    fmt = stream_format(request, stream)
+    if fmt:
+        return stream_response(
+            fmt, cache_key, lambda: recent_calls(limit, details), timeout_ms
+        )
+    return json_response(await cache.cache_response(cache_key, lambda: fetch_recent_results(limit, timeout_ms, details)))
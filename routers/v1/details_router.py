@@ -0,0 +1,81 @@
+import os
+import time
+import asyncio
+from typing import List
+from fastapi import APIRouter, status
+from pydantic import BaseModel
+from helper.is_site_available import check_if_site_available
+from helper.error_messages import error_handler
+from helper.circuit_breaker import check_site, CircuitOpenError
+from helper.mirrors import on_site
+
+router = APIRouter(tags=["Torrent Details"])
+
+# Torrents a single request may ask for
+DETAILS_MAX_ITEMS = int(os.environ.get("DETAILS_MAX_ITEMS", 100))
+
+
+class DetailRequest(BaseModel):
+    site: str
+    url: str
+
+
+async def fetch_detail(site: str, url: str):
+    """
+    The fields a torrent's detail page adds to its listing row, or an
+    error for that torrent alone.
+    """
+    site = site.lower()
+    all_sites = check_if_site_available(site)
+    item = {"site": site, "url": url}
+    if not all_sites:
+        return {**item, "error": "Selected Site Not Available"}
+    if not all_sites[site]["details_available"]:
+        return {**item, "error": f"Details not available for {site}."}
+    website = all_sites[site]["website"]()
+    if not on_site(website.BASE, url):
+        return {**item, "error": f"Not a {site} url."}
+    try:
+        check_site(site)
+        resp = await website.get_torrent_by_url(url)
+    except CircuitOpenError as e:
+        return {
+            **item,
+            "error": "Site temporarily unavailable.",
+            "retry_in": round(e.retry_in),
+        }
+    except Exception:
+        resp = None
+    if resp is None or not resp["data"]:
+        return {**item, "error": "Website Blocked Change IP or Website Domain."}
+    return {**resp["data"][0].to_dict(), **item}
+
+
+@router.post("/")
+@router.post("")
+async def get_details(torrents: List[DetailRequest]):
+    """
+    Completes listing rows fetched with details=none on demand: every
+    {site, url} pair is fetched concurrently (within each site's
+    concurrency limit, from the detail cache when possible) and answered
+    in the order given.
+    """
+    if len(torrents) > DETAILS_MAX_ITEMS:
+        return error_handler(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            json_message={
+                "error": f"At most {DETAILS_MAX_ITEMS} torrents per request."
+            },
+        )
+    start_time = time.time()
+    data = await asyncio.gather(
+        *[fetch_detail(torrent.site, torrent.url) for torrent in torrents]
+    )
+    return error_handler(
+        status_code=status.HTTP_200_OK,
+        json_message={
+            "data": data,
+            "time": time.time() - start_time,
+            "total": len(data),
+        },
+    )
@@ -1,29 +1,18 @@
 from fastapi import APIRouter, status
-from typing import Optional
+from typing import Literal, Optional
 from helper.is_site_available import check_if_site_available
-from helper.error_messages import error_handler
-from aiocache import SimpleMemoryCache
+from helper.error_messages import error_handler, json_response
+from helper.circuit_breaker import call_site, CircuitOpenError
+from helper.response_cache import response_cache
 
 router = APIRouter(tags=["Search"])
 
-# Initialize cache
-cache = SimpleMemoryCache()
+# This router's share of the response cache
+cache = response_cache.namespace("search")
 
-async def cache_response(key: str, func, expire: int = 86400):
-    """
-    Caches the response for 24 hours (86400 seconds).
-    If data is available in cache, it returns cached data.
-    If not, fetches new data, stores in cache, and returns it.
-    """
-    cached_data = await cache.get(key)
-    if cached_data:
-        return cached_data
-
-    data = await func()
-    await cache.set(key, data, ttl=expire)  # Store with 24-hour expiry
-    return data
-
-async def fetch_search_results(site: str, query: str, limit: int, page: int):
+async def fetch_search_results(
+    site: str, query: str, limit: int, page: int, details: str = "full"
+):
     site = site.lower()
     query = query.lower()
     all_sites = check_if_site_available(site)
@@ -35,7 +24,10 @@ async def fetch_search_results(site: str, query: str, limit: int, page: int):
             else limit
         )
 
-        resp = await all_sites[site]["website"]().search(query, page, limit)
+        resp = await call_site(
+            site,
+            all_sites[site]["website"]().search(query, page, limit, details=details),
+        )
         if resp is None:
             return error_handler(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -57,7 +49,20 @@ async def fetch_search_results(site: str, query: str, limit: int, page: int):
 @router.get("/")
 @router.get("")
 async def search_for_torrents(
-    site: str, query: str, limit: Optional[int] = 0, page: Optional[int] = 1
+    site: str,
+    query: str,
+    limit: Optional[int] = 0,
+    page: Optional[int] = 1,
+    details: Literal["none", "lazy", "full"] = "full",
 ):
-    cache_key = f"search:{site}:{query}:{limit}:{page}"
-    return await cache_response(cache_key, lambda: fetch_search_results(site, query, limit, page))
+    cache_key = f"search:{site}:{query}:{limit}:{page}:{details}"
+    try:
+        return json_response(await cache.cache_response(cache_key, lambda: fetch_search_results(site, query, limit, page, details)))
+    except CircuitOpenError as e:
+        return error_handler(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            json_message={
+                "error": "Site temporarily unavailable.",
+                "retry_in": round(e.retry_in),
+            },
+        )
@@ -1,25 +1,47 @@
 from fastapi import APIRouter, status
 from helper.is_site_available import check_if_site_available
-from helper.error_messages import error_handler
+from helper.error_messages import error_handler, json_response
+from helper.circuit_breaker import check_site, CircuitOpenError
+from helper.mirrors import on_site
 
 router = APIRouter(tags=["Torrent By Url"])
 
 
-# * Only supports 1337x AS OF NOW
 @router.get("/")
 @router.get("")
 async def get_torrent_from_url(site: str, url: str):
     site = site.lower()
     all_sites = check_if_site_available(site)
     if all_sites:
-        resp = await all_sites[site]["website"]().get_torrent_by_url(url)
+        if not all_sites[site]["details_available"]:
+            return error_handler(
+                status_code=status.HTTP_404_NOT_FOUND,
+                json_message={"error": f"Torrent by url not available for {site}."},
+            )
+        website = all_sites[site]["website"]()
+        if not on_site(website.BASE, url):
+            return error_handler(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                json_message={"error": f"Not a {site} url."},
+            )
+        try:
+            check_site(site)
+            resp = await website.get_torrent_by_url(url)
+        except CircuitOpenError as e:
+            return error_handler(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                json_message={
+                    "error": "Site temporarily unavailable.",
+                    "retry_in": round(e.retry_in),
+                },
+            )
         if resp is None:
             return error_handler(
                 status_code=status.HTTP_403_FORBIDDEN,
                 json_message={"error": "Website Blocked Change IP or Website Domain."},
             )
         elif len(resp["data"]) > 0:
-            return resp
+            return json_response(resp)
         else:
             return error_handler(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, status
 from helper.is_site_available import check_if_site_available, sites_config
 from helper.error_messages import error_handler
+from helper.circuit_breaker import sites_health
 
 router = APIRouter(tags=["Get all sites"])
 
@@ -14,6 +15,7 @@ async def get_all_supported_sites():
         status_code=status.HTTP_200_OK,
         json_message={
             "supported_sites": sites_list,
+            "health": sites_health(sites_list),
         },
     )
     
@@ -21,5 +23,10 @@ async def get_all_supported_sites():
 async def get_site_config():
     return error_handler(
         status_code=status.HTTP_200_OK,
-        json_message=sites_config
+        json_message={
+            site: {**config, "health": health}
+            for (site, config), health in zip(
+                sites_config.items(), sites_health(sites_config).values()
+            )
+        },
     )
@@ -0,0 +1,440 @@
+"""
+Offline parser benchmark over the recorded pages in tests/fixtures.
+
+    python -m tests.benchmark [--site 1337x --site yts] [--seconds 1]
+        [--backend lxml] [--json]
+    python -m tests.benchmark --memory [--queries 100]
+    python -m tests.benchmark --serialize [--seconds 1]
+    python -m tests.benchmark --connections [--requests 200 --concurrency 20]
+    python -m tests.benchmark --regions [--site 1337x] [--seconds 1]
+    python -m tests.benchmark --stream [--limit 2 --chunk 512 --delay-ms 5]
+
+For every parser (_parser on the listing page, _parse_detail on the detail
+page, the CPU part of _individual_scrap, _parser_individual for
+TorrentGalaxy) reports ops/sec, the memory blocks and KiB allocated by one
+call (gc is paused so the soup's reference cycles are still counted) and
+the peak traced memory of that call. Every output is checked against the
+golden JSON first, so the numbers are never measured on a broken parser.
+
+--memory compares the memory held by a full combo cache (every site's
+rows up to its limit, for --queries cached queries) as row dicts and as
+Torrent records. --serialize times encoding one such combo response with
+jsonable_encoder and the stdlib json (FastAPI's default) and with
+FastJSONResponse.
+
+--connections sends --requests fetches (--concurrency at a time) through
+Scraper._get_html to a local stub server, once over the shared pooled
+session and once with a new session per fetch as the scrapers used to,
+and reports the TCP connections the server accepted and the fetch
+latencies.
+
+--regions runs every site's _parser on its listing page twice: with the
+tree built for the site's declared Regions only and for the whole page
+(parse_only=None). For each one it reports ops/sec and the peak traced KiB
+of one call, after checking that both give the same result.
+
+--stream serves every streaming site's listing page from a local stub, in
+--chunk byte pieces --delay-ms apart like a slow upstream, and reads it
+once whole (r.text()) and once through read_until for a --limit search.
+It reports the bytes read and the wall time of both and what ended the
+streamed read: the row count, the pagination tail (1337x search pages,
+whose pagination follows the rows, so only the footer is saved) or the
+end of the page. The rows parsed from the cut page are checked against
+the whole page's first.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import sys
+import time
+import tracemalloc
+import aiohttp
+from aiohttp import web
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from helper import html_parser, html_scraper
+from helper.error_messages import FastJSONResponse
+from helper.is_site_available import all_sites
+from helper.streaming import read_until
+from helper.torrent_record import Torrent
+from helper.torrent_site import TorrentSite
+from tests.cases import SITES, make_site, parse_cases, read_fixture
+from tests.test_parsers import golden_path
+
+
+def ops_per_sec(func, args, seconds):
+    calls = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < seconds or calls < 3:
+        func(*args)
+        calls += 1
+        elapsed = time.perf_counter() - start
+    return calls / elapsed
+
+
+def allocations(func, args):
+    gc.collect()
+    gc.disable()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        result = func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+        gc.enable()
+    diff = [stat for stat in after.compare_to(before, "filename") if stat.size_diff > 0]
+    del result
+    return {
+        "alloc_blocks": sum(stat.count_diff for stat in diff),
+        "alloc_kib": round(sum(stat.size_diff for stat in diff) / 1024, 1),
+        "peak_kib": round((peak - base) / 1024, 1),
+    }
+
+
+def check_golden(site, name, result):
+    with open(golden_path(site), encoding="utf-8") as f:
+        expected = json.load(f)[name]
+    if json.loads(json.dumps(result)) != expected:
+        raise SystemExit(f"{site} {name}: output differs from the golden file")
+
+
+def run(sites, seconds):
+    rows = []
+    for site in sites:
+        for name, func, args in parse_cases(site):
+            check_golden(site, name, func(*args))
+            rows.append(
+                {
+                    "site": site,
+                    "parser": name,
+                    "ops_per_sec": round(ops_per_sec(func, args, seconds), 1),
+                    **allocations(func, args),
+                }
+            )
+    return rows
+
+
+def combo_rows(queries):
+    """
+    Row dicts of queries combo responses, completed with the site's detail
+    page where it has one, every row a separate copy the way rows parsed
+    from different pages are.
+    """
+    rows = []
+    for site in SITES:
+        with open(golden_path(site), encoding="utf-8") as f:
+            golden = json.load(f)
+        listing = golden["listing"]
+        data = (listing[0] if isinstance(listing, list) else listing)["data"]
+        data = [{**row, **(golden.get("detail") or {})} for row in data]
+        per_query = [data[i % len(data)] for i in range(all_sites[site]["limit"])]
+        rows.extend(per_query * queries)
+    return [json.loads(json.dumps(row)) for row in rows]
+
+
+def traced_size(build):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        value = build()
+        gc.collect()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return len(value), size
+
+
+def memory(queries):
+    rows, as_dicts = traced_size(lambda: combo_rows(queries))
+    _, as_records = traced_size(
+        lambda: [Torrent.from_dict(row) for row in combo_rows(queries)]
+    )
+    return {
+        "rows": rows,
+        "dict_mib": round(as_dicts / 1024**2, 1),
+        "record_mib": round(as_records / 1024**2, 1),
+        "saved": f"{1 - as_records / as_dicts:.0%}",
+    }
+
+
+def serialize(seconds):
+    data = [Torrent.from_dict(row) for row in combo_rows(1)]
+    payload = {"data": data, "time": 1.0, "total": len(data), "timed_out": []}
+    encoders = {
+        "jsonable_encoder+json": lambda: JSONResponse(jsonable_encoder(payload)).body,
+        "FastJSONResponse": lambda: FastJSONResponse(payload).body,
+    }
+    result = {"rows": len(data)}
+    for name, encode in encoders.items():
+        result[name] = {
+            "ms": round(1000 / ops_per_sec(encode, (), seconds), 2),
+            "kib": round(len(encode()) / 1024, 1),
+        }
+    return result
+
+
+async def fetch_all(requests, concurrency, shared):
+    connections = set()
+
+    async def page(request):
+        connections.add(request.transport)
+        return web.Response(text="<html></html>", content_type="text/html")
+
+    app = web.Application()
+    app.router.add_get("/{n}", page)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    base = "http://127.0.0.1:%d" % runner.addresses[0][1]
+    scraper = html_scraper.Scraper()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def fetch(n):
+        async with semaphore:
+            start = time.perf_counter()
+            # Distinct urls, identical ones would be coalesced.
+            url = f"{base}/{n}"
+            if shared:
+                await scraper._get_html(html_scraper.get_session(), url)
+            else:
+                async with aiohttp.ClientSession() as session:
+                    await scraper._get_html(session, url)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*[fetch(n) for n in range(requests)])
+        elapsed = time.perf_counter() - start
+    finally:
+        await html_scraper.close_session()
+        await runner.cleanup()
+    latencies.sort()
+    return {
+        "connections": len(connections),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+        "total_ms": round(elapsed * 1000, 1),
+    }
+
+
+def connections(requests, concurrency):
+    return {
+        "requests": requests,
+        "shared_session": asyncio.run(fetch_all(requests, concurrency, True)),
+        "session_per_fetch": asyncio.run(fetch_all(requests, concurrency, False)),
+    }
+
+
+def regions(sites, seconds):
+    rows = []
+    for site in sites:
+        obj = make_site(site)
+        args = ([read_fixture(site, "listing.html")], *obj.SEARCH.args)
+        row = {"site": site}
+        results = []
+        for name, strainer in (("regions", obj._regions), ("whole", None)):
+            obj._regions = strainer
+            results.append(json.loads(json.dumps(obj._parser(*args))))
+            row[name] = {
+                "ops_per_sec": round(ops_per_sec(obj._parser, args, seconds), 1),
+                "peak_kib": allocations(obj._parser, args)["peak_kib"],
+            }
+        if results[0] != results[1]:
+            raise SystemExit(f"{site}: the regions parse differently from the page")
+        rows.append(row)
+    return rows
+
+
+def listing_rows(obj, html, args, limit):
+    result = obj._parser([html], *args)
+    if isinstance(result, tuple):
+        result = result[0]
+    return json.loads(json.dumps(result["data"][:limit]))
+
+
+async def stream_listing(site, limit, chunk, delay):
+    obj = make_site(site)
+    obj.LIMIT = limit
+    url, args = obj.SEARCH.build(obj.BASE_URL, 1, "x")
+    page = read_fixture(site, "listing.html").encode()
+
+    async def listing(request):
+        resp = web.StreamResponse(headers={"Content-Type": "text/html; charset=utf-8"})
+        await resp.prepare(request)
+        try:
+            for start in range(0, len(page), chunk):
+                await resp.write(page[start : start + chunk])
+                await asyncio.sleep(delay)
+            await resp.write_eof()
+        except ConnectionResetError:
+            pass
+        return resp
+
+    app = web.Application()
+    app.router.add_get("/{path:.*}", listing)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    url = "http://127.0.0.1:%d%s" % (runner.addresses[0][1], url[len(obj.BASE_URL) :])
+    stop = obj._stream_stop(url)
+    try:
+        async with aiohttp.ClientSession() as session:
+            start = time.perf_counter()
+            async with session.get(url) as r:
+                full = await r.text()
+            full_s = time.perf_counter() - start
+            start = time.perf_counter()
+            async with session.get(url) as r:
+                text, stopped = await read_until(r, stop)
+            stream_s = time.perf_counter() - start
+    finally:
+        await runner.cleanup()
+    if listing_rows(obj, text, args, limit) != listing_rows(obj, full, args, limit):
+        raise SystemExit(f"{site}: rows of the streamed page differ")
+    full_bytes, read_bytes = len(full.encode()), len(text.encode())
+    return {
+        "site": site,
+        "stop": ("tail" if stop.tail_marker else "rows") if stopped else "end",
+        "full_kib": round(full_bytes / 1024, 1),
+        "read_kib": round(read_bytes / 1024, 1),
+        "bytes_saved": f"{1 - read_bytes / full_bytes:.0%}",
+        "full_ms": round(full_s * 1000, 1),
+        "stream_ms": round(stream_s * 1000, 1),
+        "time_saved": f"{1 - stream_s / full_s:.0%}",
+    }
+
+
+def stream(sites, limit, chunk, delay):
+    streaming = [
+        site
+        for site in sites
+        if all_sites[site]["website"]._stream_stop is not TorrentSite._stream_stop
+    ]
+    return [
+        asyncio.run(stream_listing(site, limit, chunk, delay)) for site in streaming
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the site parsers.")
+    parser.add_argument("--site", action="append", choices=SITES)
+    parser.add_argument("--seconds", type=float, default=0.5)
+    parser.add_argument("--backend", default=html_parser.HTML_PARSER)
+    parser.add_argument("--json", action="store_true")
+    parser.add_argument("--memory", action="store_true")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--serialize", action="store_true")
+    parser.add_argument("--connections", action="store_true")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--regions", action="store_true")
+    parser.add_argument("--stream", action="store_true")
+    parser.add_argument("--limit", type=int, default=2)
+    parser.add_argument("--chunk", type=int, default=512)
+    parser.add_argument("--delay-ms", type=float, default=5)
+    options = parser.parse_args(argv)
+    html_parser.HTML_PARSER = options.backend
+
+    if options.memory:
+        result = memory(options.queries)
+        if options.json:
+            json.dump(result, sys.stdout, indent=2)
+            print()
+        else:
+            print(
+                f"{result['rows']} rows: dicts {result['dict_mib']} MiB, "
+                f"records {result['record_mib']} MiB ({result['saved']} less)"
+            )
+        return
+
+    if options.connections:
+        result = connections(options.requests, options.concurrency)
+        if options.json:
+            json.dump(result, sys.stdout, indent=2)
+            print()
+            return
+        print(f"{result.pop('requests')} fetches, {options.concurrency} at a time")
+        print(f"{'':<20}{'connections':>12}{'mean ms':>10}{'p95 ms':>10}{'total ms':>10}")
+        for name, row in result.items():
+            print(
+                f"{name:<20}{row['connections']:>12}{row['mean_ms']:>10}"
+                f"{row['p95_ms']:>10}{row['total_ms']:>10}"
+            )
+        return
+
+    if options.regions:
+        rows = regions(options.site or SITES, options.seconds)
+        if options.json:
+            json.dump(rows, sys.stdout, indent=2)
+            print()
+            return
+        print(f"backend: {options.backend}")
+        print(
+            f"{'site':<16}{'ops/sec':>10}{'(whole)':>10}{'peak KiB':>10}{'(whole)':>10}"
+        )
+        for row in rows:
+            print(
+                f"{row['site']:<16}{row['regions']['ops_per_sec']:>10}"
+                f"{row['whole']['ops_per_sec']:>10}{row['regions']['peak_kib']:>10}"
+                f"{row['whole']['peak_kib']:>10}"
+            )
+        return
+
+    if options.stream:
+        rows = stream(
+            options.site or SITES, options.limit, options.chunk, options.delay_ms / 1000
+        )
+        if options.json:
+            json.dump(rows, sys.stdout, indent=2)
+            print()
+            return
+        print(f"limit={options.limit}, {options.chunk} bytes every {options.delay_ms} ms")
+        print(
+            f"{'site':<10}{'stop':<6}{'full KiB':>10}{'read KiB':>10}{'saved':>7}"
+            f"{'full ms':>10}{'stream ms':>11}{'saved':>7}"
+        )
+        for row in rows:
+            print(
+                f"{row['site']:<10}{row['stop']:<6}{row['full_kib']:>10}"
+                f"{row['read_kib']:>10}{row['bytes_saved']:>7}{row['full_ms']:>10}"
+                f"{row['stream_ms']:>11}{row['time_saved']:>7}"
+            )
+        return
+
+    if options.serialize:
+        result = serialize(options.seconds)
+        if options.json:
+            json.dump(result, sys.stdout, indent=2)
+            print()
+            return
+        print(f"combo response of {result.pop('rows')} rows")
+        for name, timing in result.items():
+            print(f"{name:<24}{timing['ms']:>8} ms{timing['kib']:>10} KiB")
+        return
+
+    rows = run(options.site or SITES, options.seconds)
+    if options.json:
+        json.dump(rows, sys.stdout, indent=2)
+        print()
+        return
+    print(f"backend: {options.backend}")
+    print(
+        f"{'site':<16}{'parser':<12}{'ops/sec':>10}{'blocks':>10}"
+        f"{'alloc KiB':>12}{'peak KiB':>10}"
+    )
+    for row in rows:
+        print(
+            f"{row['site']:<16}{row['parser']:<12}{row['ops_per_sec']:>10}"
+            f"{row['alloc_blocks']:>10}{row['alloc_kib']:>12}{row['peak_kib']:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
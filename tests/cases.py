@@ -0,0 +1,44 @@
+import os
+from helper.is_site_available import all_sites
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+GOLDEN = os.path.join(os.path.dirname(__file__), "golden")
+
+
+def read_fixture(site, name):
+    with open(os.path.join(FIXTURES, site, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def make_site(site):
+    """
+    The site's scraper pointed at its default domain, without mirror
+    selection, so urls built by the parsers are stable.
+    """
+    cls = all_sites[site]["website"]
+    obj = cls.__new__(cls)
+    obj.BASE_URL = cls.BASE
+    obj.LIMIT = all_sites[site]["limit"]
+    return obj
+
+
+def parse_cases(site):
+    """
+    (name, callable, arguments) for every recorded page of a site: the
+    search listing through _parser, detail pages through _parse_detail
+    and TorrentGalaxy's torrent page through _parser_individual.
+    """
+    obj = make_site(site)
+    cases = [
+        ("listing", obj._parser, ([read_fixture(site, "listing.html")], *obj.SEARCH.args))
+    ]
+    if obj._parse_detail is not None:
+        cases.append(("detail", obj._parse_detail, (read_fixture(site, "detail.html"),)))
+    if hasattr(obj, "_parser_individual"):
+        cases.append(
+            ("individual", obj._parser_individual, ([read_fixture(site, "individual.html")],))
+        )
+    return cases
+
+
+SITES = sorted(all_sites)
@@ -0,0 +1,154 @@
+import asyncio
+import json
+import time
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from routers.v1 import combo_routers
+from helper.torrent_record import Torrent
+
+
+async def answer(name, delay):
+    await asyncio.sleep(delay)
+    return {"data": [Torrent(name=name, seeders="3")], "total": 1}
+
+
+def client(monkeypatch):
+    monkeypatch.setattr(
+        combo_routers,
+        "search_calls",
+        lambda query, limit, details: [
+            ("slow", answer("slow", 0.2)),
+            ("fast", answer("fast", 0)),
+        ],
+    )
+    combo_routers.response_cache.clear()
+    app = FastAPI()
+    app.include_router(combo_routers.router, prefix="/api/v1/all")
+    return TestClient(app)
+
+
+def test_ndjson_sends_each_site_as_it_finishes(monkeypatch):
+    with client(monkeypatch) as c:
+        resp = c.get("/api/v1/all/search?query=x&stream=1")
+        assert resp.headers["content-type"].startswith("application/x-ndjson")
+        events = [json.loads(line) for line in resp.text.splitlines()]
+        assert [e["event"] for e in events] == ["rows", "rows", "summary"]
+        assert [e["site"] for e in events[:2]] == ["fast", "slow"]
+        assert events[0]["data"] == [{"name": "fast", "seeders": 3}]
+        assert events[2]["total"] == 2
+        assert events[2]["timed_out"] == []
+
+        # The merged result was cached in site order.
+        cached = c.get("/api/v1/all/search?query=x").json()
+        assert [row["name"] for row in cached["data"]] == ["slow", "fast"]
+
+
+def test_sse_on_accept_header(monkeypatch):
+    with client(monkeypatch) as c:
+        resp = c.get(
+            "/api/v1/all/search?query=x", headers={"Accept": "text/event-stream"}
+        )
+        assert resp.headers["content-type"].startswith("text/event-stream")
+        blocks = resp.text.strip().split("\n\n")
+        assert [b.splitlines()[0] for b in blocks] == [
+            "event: rows",
+            "event: rows",
+            "event: summary",
+        ]
+        assert json.loads(blocks[-1].splitlines()[1][len("data: ") :])["total"] == 2
+
+
+def test_short_deadline_results_are_cached_apart(monkeypatch):
+    with client(monkeypatch) as c:
+        monkeypatch.setattr(
+            combo_routers,
+            "search_calls",
+            lambda query, limit, details: [("slow", answer("slow", 0.2))],
+        )
+        assert c.get("/api/v1/all/search?query=abc&timeout_ms=50").status_code == 504
+        resp = c.get("/api/v1/all/search?query=abc")
+        assert resp.status_code == 200
+        assert [row["name"] for row in resp.json()["data"]] == ["slow"]
+        # The cut short result still answers its own deadline.
+        assert c.get("/api/v1/all/search?query=abc&timeout_ms=50").status_code == 504
+
+
+def test_stale_streamed_response_is_refreshed_in_the_background(monkeypatch):
+    with client(monkeypatch) as c:
+        fetches = []
+        monkeypatch.setattr(
+            combo_routers,
+            "search_calls",
+            lambda query, limit, details: fetches.append(1)
+            or [("fast", answer("fast", 0))],
+        )
+        now = time.time()
+        monkeypatch.setattr(time, "time", lambda: now)
+        c.get("/api/v1/all/search?query=stale&stream=1")
+        monkeypatch.setattr(time, "time", lambda: now + 86400 + 30)
+        resp = c.get("/api/v1/all/search?query=stale&stream=1")
+        summary = json.loads(resp.text.splitlines()[-1])
+        assert summary["cached"] and summary["age"] == 86400 + 30
+        # Answered from the cache, refreshed once behind it.
+        c.get("/api/v1/all/search?query=stale&stream=1")
+        assert len(fetches) == 2
+        summary = json.loads(
+            c.get("/api/v1/all/search?query=stale&stream=1").text.splitlines()[-1]
+        )
+        assert summary["age"] == 0
+
+
+def test_concurrent_streams_share_one_fetch():
+    combo_routers.response_cache.clear()
+    fetches = []
+
+    def calls():
+        fetches.append("stream")
+        return [("slow", answer("slow", 0.05)), ("fast", answer("fast", 0))]
+
+    async def plain_fetch():
+        fetches.append("plain")
+
+    async def read(resp):
+        return [json.loads(line) async for line in resp.body_iterator]
+
+    async def plain():
+        await asyncio.sleep(0.01)
+        return await combo_routers.cache.cache_response("search:shared", plain_fetch)
+
+    async def main():
+        streams = [
+            read(combo_routers.stream_response("ndjson", "search:shared", calls, None))
+            for _ in range(3)
+        ]
+        return await asyncio.gather(*streams, plain())
+
+    *streams, combo = asyncio.run(main())
+    assert fetches == ["stream"]
+    assert [row["name"] for row in combo["data"]] == ["slow", "fast"]
+    # The first stream ran the fetch and got each site as it answered, the
+    # others its merged result.
+    assert [e.get("site") for e in streams[0]] == ["fast", "slow", None]
+    for events in streams[1:]:
+        assert [e["event"] for e in events] == ["rows", "summary"]
+        assert [row["name"] for row in events[0]["data"]] == ["slow", "fast"]
+        assert events[1]["total"] == 2
+
+
+def test_cached_errors_are_streamed_as_their_summary(monkeypatch):
+    with client(monkeypatch) as c:
+        fetches = []
+        monkeypatch.setattr(
+            combo_routers,
+            "search_calls",
+            lambda query, limit, details: fetches.append(1)
+            or [("slow", answer("slow", 0.2))],
+        )
+        for cached in (False, True):
+            resp = c.get("/api/v1/all/search?query=late&timeout_ms=50&stream=1")
+            summary = json.loads(resp.text.splitlines()[-1])
+            assert summary["status"] == 504
+            assert summary["error"] == "Sites timed out."
+            assert summary["timed_out"] == ["slow"]
+            assert summary.get("cached", False) == cached
+        assert len(fetches) == 1
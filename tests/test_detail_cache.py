@@ -0,0 +1,28 @@
+import time
+from helper.detail_cache import DetailCache
+
+
+def test_hit_by_url_path_and_infohash():
+    cache = DetailCache(10, 60)
+    cache.set("1337x", "https://1337x.to/torrent/1/a/", {"hash": "abc", "seeders": 5})
+    # Same torrent on another mirror.
+    assert cache.get("1337x", "https://1337x.st/torrent/1/a/") == {"hash": "abc"}
+    assert cache.get("1337x", "https://1337x.to/torrent/9/other/", "ABC") == {
+        "hash": "abc"
+    }
+    assert cache.get("torlock", "https://1337x.to/torrent/1/a/") is None
+    assert cache.stats() == {"entries": 1, "hits": 2, "misses": 1, "hit_ratio": 0.667}
+
+
+def test_bounded_and_expiring(monkeypatch):
+    cache = DetailCache(2, 60)
+    for name in "abc":
+        cache.set("yts", f"https://yts.mx/{name}", {"hash": name})
+    assert cache.get("yts", "https://yts.mx/a") is None
+    assert cache.get("yts", "https://yts.mx/x", "a") is None
+    assert cache.get("yts", "https://yts.mx/c") == {"hash": "c"}
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 61)
+    assert cache.get("yts", "https://yts.mx/c") is None
+    assert cache.stats()["entries"] == 1
@@ -0,0 +1,38 @@
+import asyncio
+from helper import circuit_breaker
+from helper.mirrors import on_site
+from routers.v1 import details_router
+from torrents.x1337 import x1337
+
+
+def test_only_urls_on_the_site_are_fetched(monkeypatch):
+    fetched = []
+
+    async def get_torrent_by_url(self, url):
+        fetched.append(url)
+        return None
+
+    monkeypatch.setattr(x1337, "get_torrent_by_url", get_torrent_by_url)
+    monkeypatch.setattr(circuit_breaker, "_breakers", {})
+    urls = [
+        "http://127.0.0.1:8080/admin",
+        "https://1337x.to@127.0.0.1/torrent/1/",
+        "http://1337x.to/torrent/1/",
+    ] + ["https://1337x.to/torrent/%d/" % i for i in range(10)]
+
+    async def main():
+        return await asyncio.gather(
+            *[details_router.fetch_detail("1337x", url) for url in urls]
+        )
+
+    data = asyncio.run(main())
+    assert [item["error"] for item in data[:3]] == ["Not a 1337x url."] * 3
+    assert fetched == urls[3:]
+    # Failed lookups of client urls leave the listings' breaker closed.
+    assert circuit_breaker.get_breaker("1337x").stats()["state"] == "closed"
+
+
+def test_on_site():
+    assert on_site("https://1337x.to", "https://1337X.to/torrent/1/")
+    assert not on_site("https://1337x.to", "https://1337x.to.evil.com/")
+    assert not on_site("https://1337x.to", "file:///etc/passwd")
@@ -0,0 +1,61 @@
+import asyncio
+import threading
+import time
+from torrents import magnet_dl
+from tests.cases import make_site, read_fixture
+
+
+def test_search_does_not_block_the_event_loop(monkeypatch):
+    listing = read_fixture("magnetdl", "listing.html")
+
+    def fetch(url):
+        # cloudscraper blocks its thread for the whole request.
+        time.sleep(0.3)
+        return listing
+
+    monkeypatch.setattr(magnet_dl, "_fetch", fetch)
+    site = make_site("magnetdl")
+
+    async def main():
+        lag = 0.0
+        done = asyncio.Event()
+
+        async def ticker():
+            nonlocal lag
+            while not done.is_set():
+                start = time.perf_counter()
+                await asyncio.sleep(0.01)
+                lag = max(lag, time.perf_counter() - start - 0.01)
+
+        tick = asyncio.create_task(ticker())
+        try:
+            result = await site.search("avengers", 1, 20, details="none")
+        finally:
+            done.set()
+            await tick
+        return result, lag
+
+    result, lag = asyncio.run(main())
+    assert result["total"] > 0
+    assert lag < 0.1
+
+
+def test_each_thread_has_its_own_scraper_sharing_cookies(monkeypatch):
+    monkeypatch.setattr(magnet_dl, "_local", threading.local())
+    monkeypatch.setattr(magnet_dl, "_shared", None)
+    scrapers = []
+
+    def get():
+        scrapers.append(magnet_dl._get_cloud_scraper())
+
+    threads = [threading.Thread(target=get) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    get()
+    get()
+
+    assert len({id(scraper) for scraper in scrapers}) == 4
+    assert len({id(scraper.cookies) for scraper in scrapers}) == 1
+    assert len({scraper.headers["User-Agent"] for scraper in scrapers}) == 1
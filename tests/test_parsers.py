@@ -0,0 +1,66 @@
+import json
+import os
+import pytest
+from helper import html_parser
+from tests.cases import GOLDEN, SITES, make_site, parse_cases, read_fixture
+
+try:
+    import lxml  # noqa: F401
+
+    BACKENDS = ["lxml", "html.parser"]
+except ImportError:
+    BACKENDS = ["html.parser"]
+
+# UPDATE_GOLDEN=1 rewrites the golden files from the current parsers
+# instead of comparing against them, review the diff before committing.
+UPDATE_GOLDEN = os.environ.get("UPDATE_GOLDEN") == "1"
+
+
+def run_cases(site):
+    # Round trip through json so tuples compare equal to the stored lists.
+    return {
+        name: json.loads(json.dumps(func(*args)))
+        for name, func, args in parse_cases(site)
+    }
+
+
+def golden_path(site):
+    return os.path.join(GOLDEN, f"{site}.json")
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("site", SITES)
+def test_parser_matches_golden(site, backend, monkeypatch):
+    monkeypatch.setattr(html_parser, "HTML_PARSER", backend)
+    result = run_cases(site)
+    if UPDATE_GOLDEN and backend == BACKENDS[0]:
+        os.makedirs(GOLDEN, exist_ok=True)
+        with open(golden_path(site), "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+    with open(golden_path(site), encoding="utf-8") as f:
+        assert result == json.load(f)
+
+
+@pytest.mark.parametrize("site", SITES)
+def test_parser_finds_rows(site):
+    listing = run_cases(site)["listing"]
+    if isinstance(listing, list):
+        listing = listing[0]
+    assert listing is not None
+    assert listing["data"]
+
+
+@pytest.mark.parametrize("site", SITES)
+def test_regions_parse_like_the_whole_page(site):
+    obj = make_site(site)
+    html = read_fixture(site, "listing.html")
+    args = ([html], *obj.SEARCH.args)
+    in_regions = json.loads(json.dumps(obj._parser(*args)))
+    obj._regions = None
+    assert json.loads(json.dumps(obj._parser(*args))) == in_regions
+    # Only the declared regions were built.
+    regions = type(obj)._regions
+    assert len(html_parser.make_soup(html, regions).find_all()) < len(
+        html_parser.make_soup(html).find_all()
+    )
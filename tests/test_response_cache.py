@@ -0,0 +1,283 @@
+import asyncio
+import json
+import time
+from helper.response_cache import (
+    ResponseCache,
+    SqliteCache,
+    RedisCache,
+    parse_budgets,
+    response_updates,
+    ENTRY_OVERHEAD,
+)
+from helper.error_messages import error_handler
+
+
+def row(size):
+    # {"data":"xx..."} encodes to size + 11 bytes
+    return {"data": "x" * size}
+
+
+def entry_size(key, size):
+    return size + 11 + len(key) + ENTRY_OVERHEAD
+
+
+def test_namespace_evicts_its_own_oldest_entries():
+    cache = ResponseCache(100, 10_000, {"search": 0.2, "combo": 0.8})
+    cache.namespace("search")
+    cache.namespace("combo")
+    cache.set("combo", "a", row(1000), 60)
+    for key in "abcd":
+        cache.set("search", key, row(500), 60)
+    # 2000 bytes for search holds two of its entries.
+    assert cache.get("search", "a") is None
+    assert cache.get("search", "b") is None
+    assert cache.get("search", "d") == row(500)
+    assert cache.get("combo", "a") == row(1000)
+    assert cache.bytes == 2 * entry_size("a", 500) + entry_size("a", 1000)
+
+
+def test_global_bounds_evict_from_the_namespace_furthest_over():
+    cache = ResponseCache(3, 100_000, {"search": 0.5, "combo": 0.5})
+    cache.namespace("search")
+    cache.namespace("combo")
+    cache.set("combo", "a", row(10), 60)
+    cache.set("search", "a", row(3000), 60)
+    cache.set("search", "b", row(3000), 60)
+    cache.set("combo", "b", row(10), 60)
+    assert cache.entries == 3
+    assert cache.get("search", "a") is None
+    assert cache.get("combo", "a") == row(10)
+
+
+def test_too_large_and_expired_entries(monkeypatch):
+    cache = ResponseCache(10, 1000, {"search": 1}, stale_ttl=0)
+    cache.namespace("search")
+    cache.set("search", "big", row(2000), 60)
+    assert cache.get("search", "big") is None
+    assert cache.entries == 0
+
+    cache.set("search", "a", error_handler(404, {"error": "Result not found."}), 60)
+    assert cache.get("search", "a").status_code == 404
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert cache.get("search", "a") is None
+    assert cache.bytes == 0
+    stats = cache.stats()["namespaces"]["search"]
+    assert stats["entries"] == 0 and stats["hit_ratio"] == 0.333
+
+
+def test_cache_response_fetches_once_with_namespace_ttl():
+    cache = ResponseCache(10, 100_000, {"combo": 1})
+    ttls = []
+    combo = cache.namespace("combo", ttl=lambda data, expire: ttls.append(expire) or 5)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return row(10)
+
+    async def main():
+        return await asyncio.gather(
+            *[combo.cache_response("k", fetch, 100) for _ in range(3)]
+        ) + [await combo.cache_response("k", fetch, 100)]
+
+    *fetched, cached = asyncio.run(main())
+    assert fetched == [row(10)] * 3
+    assert json.loads(cached.body) == row(10)
+    assert cached.headers["Age"] == "0"
+    assert calls == [1]
+    assert ttls == [100]
+
+
+def test_stale_response_is_served_while_one_refresh_runs(monkeypatch):
+    cache = ResponseCache(10, 100_000, {"search": 1}, stale_ttl=60)
+    search = cache.namespace("search")
+    now = time.time()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return row(len(calls))
+
+    async def main():
+        monkeypatch.setattr(time, "time", lambda: now)
+        await search.set("k", row(0), 10)
+        monkeypatch.setattr(time, "time", lambda: now + 30)
+        stale = await asyncio.gather(
+            *[search.cache_response("k", fetch, 10) for _ in range(3)]
+        )
+        assert calls == [1]
+        await asyncio.sleep(0.05)
+        fresh = await search.cache_response("k", fetch, 10)
+        # Past the stale window the caller waits for new data.
+        monkeypatch.setattr(time, "time", lambda: now + 30 + 71)
+        waited = await search.cache_response("k", fetch, 10)
+        return stale, fresh, waited
+
+    stale, fresh, waited = asyncio.run(main())
+    assert [json.loads(r.body) for r in stale] == [row(0)] * 3
+    assert stale[0].headers["Age"] == "30"
+    assert json.loads(fresh.body) == row(1)
+    assert fresh.headers["Age"] == "0"
+    assert waited == row(2)
+    assert calls == [1, 1]
+
+
+def test_parse_budgets():
+    budgets = parse_budgets("combo=0.5, search=x,books=0.1")
+    assert budgets["combo"] == 0.5
+    assert budgets["search"] == 0.3
+    assert budgets["books"] == 0.1
+
+
+def test_sqlite_cache_is_shared_between_workers(tmp_path):
+    path = str(tmp_path / "cache.db")
+    workers = [
+        SqliteCache(path, 100, 10_000, {"search": 0.2}, stale_ttl=0) for _ in range(2)
+    ]
+    first, second = [worker.namespace("search") for worker in workers]
+
+    async def main():
+        await first.set("a", {"data": [{"name": "a", "seeders": 3}]}, 60)
+        await first.set("missing", error_handler(404, {"error": "Result not found."}))
+        assert await second.get("a") == {"data": [{"name": "a", "seeders": 3}]}
+        missing = await second.get("missing")
+        assert missing.status_code == 404
+        assert missing.body == b'{"error":"Result not found."}'
+        # 2000 bytes for search: b, c and d push out a (least recently used).
+        await second.get("missing")
+        for key in "bcd":
+            await first.set(key, row(400), 60)
+        assert await second.get("a") is None
+        assert await second.get("d") == row(400)
+        await first.set("gone", row(10), -1)
+        assert await second.get("gone") is None
+
+    asyncio.run(main())
+    assert workers[1].stats()["namespaces"]["search"]["hit_ratio"] == 0.667
+
+
+async def resp_server(store):
+    """
+    Stand-in Redis server: GET, SET with PX (ignored) and SELECT.
+    """
+
+    async def client(reader, writer):
+        while True:
+            try:
+                count = int((await reader.readuntil(b"\r\n"))[1:-2])
+            except asyncio.IncompleteReadError:
+                break
+            args = []
+            for _ in range(count):
+                length = int((await reader.readuntil(b"\r\n"))[1:-2])
+                args.append((await reader.readexactly(length + 2))[:-2])
+            command = args[0].upper()
+            if command == b"GET":
+                value = store.get(args[1])
+                reply = b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+            elif command == b"SET":
+                store[args[1]] = args[2]
+                reply = b"+OK\r\n"
+            elif command == b"SELECT":
+                reply = b"+OK\r\n"
+            else:
+                reply = b"-ERR unknown command\r\n"
+            writer.write(reply)
+            await writer.drain()
+        writer.close()
+
+    return await asyncio.start_server(client, "127.0.0.1", 0)
+
+
+def test_redis_cache_against_a_stand_in_server():
+    store = {}
+
+    async def main():
+        server = await resp_server(store)
+        port = server.sockets[0].getsockname()[1]
+        cache = RedisCache(f"redis://127.0.0.1:{port}/2", 100, 10_000, {"combo": 1})
+        combo = cache.namespace("combo")
+        await combo.set("k", row(10), 60)
+        assert await combo.get("k") == row(10)
+        assert await combo.get("other") is None
+        server.close()
+        await server.wait_closed()
+        cache.client.close()
+        # Server gone: a miss, not an error.
+        assert await combo.get("k") is None
+        return cache
+
+    cache = asyncio.run(main())
+    assert list(store) == [b"torrent-api:combo:k"]
+    assert cache.stats()["namespaces"]["combo"]["hit_ratio"] == 0.333
+
+
+def test_lazily_completed_rows_are_stored_again(tmp_path):
+    memory = ResponseCache(10, 100_000, {"search": 1})
+    sqlite = SqliteCache(str(tmp_path / "cache.db"), 10, 100_000, {"search": 1})
+    namespaces = [memory.namespace("search"), sqlite.namespace("search")]
+
+    async def fetch():
+        data = {"data": [{"name": "a"}]}
+
+        async def complete():
+            await asyncio.sleep(0.01)
+            data["data"][0]["files"] = ["x" * 1000]
+
+        response_updates.get().append(asyncio.ensure_future(complete()))
+        return data
+
+    async def main():
+        for search in namespaces:
+            await search.cache_response("k", fetch)
+        before = memory.bytes
+        assert "files" not in (await namespaces[1].get("k"))["data"][0]
+        await asyncio.sleep(0.05)
+        return before
+
+    before = asyncio.run(main())
+    assert memory.bytes > before + 1000
+    stored = asyncio.run(namespaces[1].get("k"))
+    assert stored["data"][0]["files"] == ["x" * 1000]
+
+
+def test_completed_rows_do_not_replace_newer_entries(tmp_path, monkeypatch):
+    memory = ResponseCache(10, 100_000, {"search": 1})
+    sqlite = SqliteCache(str(tmp_path / "cache.db"), 10, 100_000, {"search": 1})
+    now = time.time()
+
+    async def main(backend):
+        search = backend.namespace("search")
+
+        async def store(name):
+            row = {"name": name}
+
+            async def complete():
+                await asyncio.sleep(0.01)
+                row["files"] = ["x"]
+
+            await search.set(name, row, 60, [asyncio.ensure_future(complete())])
+
+        monkeypatch.setattr(time, "time", lambda: now)
+        await store("dropped")
+        backend.clear()
+        await store("kept")
+        await store("replaced")
+        monkeypatch.setattr(time, "time", lambda: now + 5)
+        await search.set("replaced", {"name": "newer"}, 60)
+        await asyncio.sleep(0.05)
+        return [
+            await backend.load("search", name)
+            for name in ("kept", "replaced", "dropped")
+        ]
+
+    for backend in (memory, sqlite):
+        kept, replaced, dropped = asyncio.run(main(backend))
+        assert kept.value == {"name": "kept", "files": ["x"]}
+        # Stored again with the age it had.
+        assert round(kept.stored_at, 3) == round(now, 3)
+        assert replaced.value == {"name": "newer"}
+        assert dropped is None
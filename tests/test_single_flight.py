@@ -0,0 +1,79 @@
+import asyncio
+from aiohttp import web
+from helper import html_scraper
+from helper.response_cache import ResponseCache
+from helper.single_flight import SingleFlight
+
+
+def test_identical_upstream_fetches_share_one_request():
+    hits = []
+
+    async def page(request):
+        hits.append(request.path)
+        await asyncio.sleep(0.05)
+        return web.Response(text="<html>ok</html>", content_type="text/html")
+
+    async def main():
+        app = web.Application()
+        app.router.add_get("/{name}", page)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", 0).start()
+        url = "http://127.0.0.1:%d/listing" % runner.addresses[0][1]
+        scraper = html_scraper.Scraper()
+        session = html_scraper.get_session()
+        try:
+            same = await asyncio.gather(
+                *[scraper._get_html(session, url) for _ in range(10)]
+            )
+            # Another encoding is another request.
+            other = await scraper._get_html(session, url, encoding="ISO-8859-1")
+        finally:
+            await html_scraper.close_session()
+            await runner.cleanup()
+        return same, other
+
+    same, other = asyncio.run(main())
+    assert same == ["<html>ok</html>"] * 10
+    assert other == "<html>ok</html>"
+    assert hits == ["/listing", "/listing"]
+
+
+def test_concurrent_cache_misses_share_one_fetch():
+    search = ResponseCache(10, 100_000, {"search": 1}).namespace("search")
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"data": [], "total": 0}
+
+    async def main():
+        return await asyncio.gather(
+            *[search.cache_response("search:1337x:x", fetch) for _ in range(10)]
+        )
+
+    assert asyncio.run(main()) == [{"data": [], "total": 0}] * 10
+    assert calls == [1]
+
+
+def test_cancelled_waiter_does_not_cancel_the_shared_task():
+    flight = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def main():
+        first = asyncio.ensure_future(flight.do("k", work))
+        second = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        result = await second
+        assert first.cancelled()
+        return result
+
+    assert asyncio.run(main()) == "done"
+    assert calls == [1]
@@ -0,0 +1,57 @@
+import asyncio
+from helper.streaming import StreamStop, read_until
+
+
+class ChunkedResponse:
+    """
+    Stands in for an aiohttp response, its body arriving in the given chunks.
+    """
+
+    charset = "utf-8"
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.read = 0
+        self.content = self
+
+    async def iter_chunked(self, size):
+        for chunk in self.chunks:
+            self.read += 1
+            yield chunk
+
+
+def page(rows, tail=b""):
+    chunks = [b"<html><table>"]
+    # Row markers split across two chunks are still counted.
+    for i in range(rows):
+        chunks += [b"<tr cl", b'ass="row"><td>%d</td></tr>' % i]
+    return chunks + [b"</table>", tail, b"<footer>", b"</footer></html>"]
+
+
+def test_stops_once_the_rows_are_read():
+    response = ChunkedResponse(page(10))
+    text, stopped = asyncio.run(read_until(response, StreamStop('<tr class="row">', 3)))
+    assert stopped
+    # The third row is complete once the fourth one starts.
+    assert response.read == 1 + 2 * 3 + 2
+    assert text.count('<tr class="row">') == 4
+    assert "<footer>" not in text
+
+
+def test_stops_once_the_tail_is_closed():
+    chunks = page(4, b'<div class="pagination"><ul><li>1</li>')
+    chunks.insert(chunks.index(b"<footer>"), b"<li>9</li></ul></div>")
+    response = ChunkedResponse(chunks)
+    stop = StreamStop('<tr class="row">', 2, '<div class="pagination">', "</ul>")
+    text, stopped = asyncio.run(read_until(response, stop))
+    assert stopped
+    assert text.endswith("<li>9</li></ul></div>")
+    assert response.read == len(chunks) - 2
+
+
+def test_short_pages_are_read_to_the_end():
+    response = ChunkedResponse(page(2))
+    text, stopped = asyncio.run(read_until(response, StreamStop('<tr class="row">', 5)))
+    assert not stopped
+    assert response.read == len(response.chunks)
+    assert text.endswith("</footer></html>")
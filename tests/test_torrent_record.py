@@ -0,0 +1,78 @@
+import json
+import pickle
+import pytest
+from fastapi.encoders import jsonable_encoder
+from helper.error_messages import FastJSONResponse
+from helper.torrent_record import Torrent, size_to_bytes, to_int, to_records
+from tests.cases import SITES
+from tests.test_parsers import golden_path
+
+
+def golden_rows(site):
+    with open(golden_path(site), encoding="utf-8") as f:
+        listing = json.load(f)["listing"]
+    if isinstance(listing, list):
+        listing = listing[0]
+    return listing["data"]
+
+
+@pytest.mark.parametrize(
+    "size, expected",
+    [
+        ("1.4 GB", int(1.4 * 1024**3)),
+        ("885.60 MB", int(885.6 * 1024**2)),
+        ("2.2\xa0GiB", int(2.2 * 1024**3)),
+        ("3 Mb", 3 * 1024**2),
+        ("1,234.5 KB", int(1234.5 * 1024)),
+        ("512 B", 512),
+        ("", None),
+        (None, None),
+        ("unknown", None),
+    ],
+)
+def test_size_to_bytes(size, expected):
+    assert size_to_bytes(size) == expected
+
+
+def test_to_int():
+    assert to_int("1,234") == 1234
+    assert to_int(" 7 ") == 7
+    assert to_int(3) == 3
+    assert to_int("-") is None
+    assert to_int(None) is None
+
+
+@pytest.mark.parametrize("site", SITES)
+def test_records_keep_the_site_fields(site):
+    for row in golden_rows(site):
+        record = Torrent.from_dict(row)
+        converted = record.to_dict()
+        expected = {key: value for key, value in row.items() if value is not None}
+        assert set(converted) - {"size_bytes"} == set(expected)
+        for key in ("seeders", "leechers", "downloads"):
+            if key in converted:
+                assert converted[key] == int(row[key])
+        if row.get("size"):
+            assert converted["size_bytes"] > 0
+        assert jsonable_encoder(record) == jsonable_encoder(converted)
+        assert json.loads(FastJSONResponse(record).body) == jsonable_encoder(converted)
+        assert pickle.loads(pickle.dumps(record)) == record
+
+
+def test_update_and_to_records():
+    result = {"data": [{"name": "a", "seeders": "3", "url": "u"}]}
+    to_records(result)
+    record = result["data"][0]
+    record.update({"files": ["a.mkv"], "seeders": "4", "magnet": "m"})
+    assert record.seeders == 4
+    assert record["files"] == ["a.mkv"]
+    assert record.to_dict() == {
+        "name": "a",
+        "seeders": 4,
+        "url": "u",
+        "magnet": "m",
+        "files": ["a.mkv"],
+    }
+    with pytest.raises(KeyError):
+        record["poster"]
+    assert not hasattr(record, "__dict__")
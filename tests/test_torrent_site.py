@@ -0,0 +1,71 @@
+import asyncio
+from tests.cases import make_site
+
+
+def test_get_torrent_fetches_each_url_once():
+    site = make_site("1337x")
+    fetched = []
+
+    async def fetch_detail(session, url, infohash=None):
+        fetched.append(url)
+        return {"magnet": f"magnet:{url}"}
+
+    site._fetch_detail = fetch_detail
+    rows = [{"url": "a"}, {"url": "b"}, {"url": "a"}, {"url": "c"}]
+    result = asyncio.run(site._get_torrent({"data": rows}, None, ["a", "b", "a", "x"]))
+
+    assert sorted(fetched) == ["a", "b"]
+    assert [row.get("magnet") for row in result["data"]] == [
+        "magnet:a",
+        "magnet:b",
+        "magnet:a",
+        None,
+    ]
+
+
+def test_paged_result_fetches_missing_pages_concurrently():
+    site = make_site("1337x")
+    site.LIMIT = 45
+    site.DETAILS = "none"
+    fetched = []
+    running = []
+
+    async def parse_page(session, url, args, parser=None):
+        page = int(url)
+        fetched.append(page)
+        running.append(page)
+        await asyncio.sleep(0.01)
+        peak = len(running)
+        running.remove(page)
+        # Page 3 repeats the last row of page 2, as a listing moving would.
+        first = 20 * (page - 1) - (1 if page == 3 else 0)
+        rows = [{"url": str(i), "name": str(peak)} for i in range(first, first + 20)]
+        return {"data": rows, "current_page": page, "total_pages": 9}, []
+
+    site._parse_page = parse_page
+    result = asyncio.run(site._paged_result(0, None, 1, (), str))
+
+    assert fetched == [1, 2, 3]
+    assert [row["url"] for row in result["data"]] == [str(i) for i in range(45)]
+    # Pages 2 and 3 were in flight together.
+    assert result["data"][20]["name"] == "2"
+    assert result["current_page"] == 3
+    assert result["total"] == 45
+
+
+def test_paged_result_stops_at_total_pages():
+    site = make_site("1337x")
+    site.LIMIT = 100
+    site.DETAILS = "none"
+    fetched = []
+
+    async def parse_page(session, url, args, parser=None):
+        fetched.append(int(url))
+        rows = [{"url": f"{url}-{i}"} for i in range(20)]
+        return {"data": rows, "total_pages": 2}, []
+
+    site._parse_page = parse_page
+    result = asyncio.run(site._paged_result(0, None, 1, (), str))
+
+    assert fetched == [1, 2]
+    assert result["total"] == 40
@@ -0,0 +1,79 @@
+import asyncio
+from aiohttp import web
+from helper import html_scraper
+from helper.streaming import StreamStop
+from helper.upstream_cache import LRU, validators
+
+
+def test_lru_bounded_in_bytes():
+    cache = LRU(10, 100, len)
+    cache.set("a", "x" * 40)
+    cache.set("b", "x" * 40)
+    cache.set("a", "x" * 30)
+    cache.set("c", "x" * 40)
+    # b is the oldest once a was replaced.
+    assert cache.get("b") is None
+    assert cache.get("a") == "x" * 30
+    assert cache.bytes == 70
+    cache.set("big", "x" * 101)
+    assert cache.get("big") is None
+    assert len(cache) == 2
+
+
+def test_only_listing_pages_are_kept_for_revalidation():
+    async def page(request):
+        return web.Response(
+            text="<html>page</html>", content_type="text/html", headers={"ETag": '"1"'}
+        )
+
+    async def main():
+        app = web.Application()
+        app.router.add_get("/{name}", page)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", 0).start()
+        base = "http://127.0.0.1:%d" % runner.addresses[0][1]
+        scraper = html_scraper.Scraper()
+        session = html_scraper.get_session()
+        try:
+            await scraper._get_html(session, base + "/listing")
+            await scraper._get_html(session, base + "/detail", revalidate=False)
+        finally:
+            await html_scraper.close_session()
+            await runner.cleanup()
+        return base
+
+    base = asyncio.run(main())
+    assert validators.get((base + "/listing", None))["etag"] == '"1"'
+    assert validators.get((base + "/detail", None)) is None
+
+
+def test_streamed_error_pages_are_not_kept_for_revalidation():
+    async def blocked(request):
+        return web.Response(
+            text="<html>blocked</html>",
+            status=403,
+            content_type="text/html",
+            headers={"ETag": '"2"'},
+        )
+
+    async def main():
+        app = web.Application()
+        app.router.add_get("/{name}", blocked)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", 0).start()
+        url = "http://127.0.0.1:%d/listing" % runner.addresses[0][1]
+        stop = StreamStop("<tr>", 20, None, None)
+        try:
+            body = await html_scraper.Scraper()._get_html(
+                html_scraper.get_session(), url, stop=stop
+            )
+        finally:
+            await html_scraper.close_session()
+            await runner.cleanup()
+        return url, body
+
+    url, body = asyncio.run(main())
+    assert body == "<html>blocked</html>"
+    assert validators.get((url, None)) is None
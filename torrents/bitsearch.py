@@ -1,21 +1,23 @@
 import re
-import time
-import aiohttp
-from bs4 import BeautifulSoup
-from helper.html_scraper import Scraper
+from bs4 import SoupStrainer
+from helper.html_parser import make_soup, Regions
+from helper.torrent_site import TorrentSite, Route
 from constants.base_url import BITSEARCH
 
 
-class Bitsearch:
+class Bitsearch(TorrentSite):
     _name = "Bit Search"
-    def __init__(self):
-        self.BASE_URL = BITSEARCH
-        self.LIMIT = None
+    _regions = Regions(
+        SoupStrainer("main"),
+    )
+    BASE = BITSEARCH
+    SEARCH = Route("/search?q={query}&page={page}")
+    TRENDING = Route("/trending")
 
     def _parser(self, htmls):
         try:
             for html in htmls:
-                soup = BeautifulSoup(html, "html.parser")
+                soup = make_soup(html, self._regions)
 
                 my_dict = {"data": []}
                 for divs in soup.find_all("li", class_="search-result"):
@@ -58,7 +60,7 @@ class Bitsearch:
                     total_pages = (
                         int(
                             soup.select(
-                                "body > main > div.container.mt-2 > div > div:nth-child(1) > div > span > b"
+                                "main > div.container.mt-2 > div > div:nth-child(1) > div > span > b"
                             )[0].text
                         )
                         / 20
@@ -83,26 +85,3 @@ class Bitsearch:
                 return my_dict
         except:
             return None
-
-    async def search(self, query, page, limit):
-        async with aiohttp.ClientSession() as session:
-            start_time = time.time()
-            self.LIMIT = limit
-            url = self.BASE_URL + "/search?q={}&page={}".format(query, page)
-            return await self.parser_result(start_time, url, session)
-
-    async def parser_result(self, start_time, url, session):
-        html = await Scraper().get_all_results(session, url)
-        results = self._parser(html)
-        if results is not None:
-            results["time"] = time.time() - start_time
-            results["total"] = len(results["data"])
-            return results
-        return results
-
-    async def trending(self, category, page, limit):
-        async with aiohttp.ClientSession() as session:
-            start_time = time.time()
-            self.LIMIT = limit
-            url = self.BASE_URL + "/trending"
-            return await self.parser_result(start_time, url, session)
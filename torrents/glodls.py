@@ -1,20 +1,26 @@
-import time
-import aiohttp
-from bs4 import BeautifulSoup
-from helper.html_scraper import Scraper
+from bs4 import SoupStrainer
+from helper.html_parser import make_soup, Regions
+from helper.torrent_site import TorrentSite, Route
 from constants.base_url import GLODLS
 
 
-class Glodls:
+class Glodls(TorrentSite):
     _name = "Glodls"
-    def __init__(self):
-        self.BASE_URL = GLODLS
-        self.LIMIT = None
+    _regions = Regions(
+        SoupStrainer("tr", class_="t-row"),
+        SoupStrainer("div", class_="pagination"),
+    )
+    BASE = GLODLS
+    SEARCH = Route(
+        "/search_results.php?search={query}&cat=0&incldead=0&inclexternal=0&lang=0&sort=seeders&order=desc&page={page0}"
+    )
+    TRENDING = Route("/today.php")
+    RECENT = Route("/search.php")
 
     def _parser(self, htmls):
         try:
             for html in htmls:
-                soup = BeautifulSoup(html, "html.parser")
+                soup = make_soup(html, self._regions)
 
                 my_dict = {"data": []}
                 for tr in soup.find_all("tr", class_="t-row")[0:-1:2]:
@@ -54,38 +60,3 @@ class Glodls:
                 return my_dict
         except:
             return None
-
-    async def search(self, query, page, limit):
-        async with aiohttp.ClientSession() as session:
-            start_time = time.time()
-            self.LIMIT = limit
-            url = (
-                self.BASE_URL
-                + "/search_results.php?search={}&cat=0&incldead=0&inclexternal=0&lang=0&sort=seeders&order=desc&page={}".format(
-                    query, page - 1
-                )
-            )
-            return await self.parser_result(start_time, url, session)
-
-    async def parser_result(self, start_time, url, session):
-        html = await Scraper().get_all_results(session, url)
-        results = self._parser(html)
-        if results is not None:
-            results["time"] = time.time() - start_time
-            results["total"] = len(results["data"])
-            return results
-        return results
-
-    async def trending(self, category, page, limit):
-        async with aiohttp.ClientSession() as session:
-            start_time = time.time()
-            self.LIMIT = limit
-            url = self.BASE_URL + "/today.php"
-            return await self.parser_result(start_time, url, session)
-
-    async def recent(self, category, page, limit):
-        async with aiohttp.ClientSession() as session:
-            start_time = time.time()
-            self.LIMIT = limit
-            url = self.BASE_URL + "/search.php"
-            return await self.parser_result(start_time, url, session)
@@ -1,64 +1,52 @@
-import asyncio
 import re
-import time
-import aiohttp
-from bs4 import BeautifulSoup
-from helper.asyncioPoliciesFix import decorator_asyncio_fix
-from helper.html_scraper import Scraper
+from bs4 import SoupStrainer
+from helper.html_parser import make_soup, Regions, css
+from helper.torrent_site import TorrentSite, Route
 from constants.base_url import KICKASS
-from constants.headers import HEADER_AIO
 
 
-class Kickass:
+class Kickass(TorrentSite):
     _name = "Kick Ass"
-    def __init__(self):
-        self.BASE_URL = KICKASS
-        self.LIMIT = None
+    _regions = Regions(
+        SoupStrainer("tr", class_=["odd", "even"]),
+        SoupStrainer("div", class_="pages"),
+    )
+    BASE = KICKASS
+    ROWS = css("tr.odd,tr.even")
+    SEARCH = Route("/usearch/{query}/{page}/")
+    TRENDING = Route(
+        "/top-100", "/top-100-{category}/", categories={"apps": "applications"}
+    )
+    RECENT = Route("/new/", "/{category}/")
 
-    @decorator_asyncio_fix
-    async def _individual_scrap(self, session, url, obj):
+    def _parse_detail(self, html):
+        obj = {}
+        soup = make_soup(html)
         try:
-            async with session.get(url, headers=HEADER_AIO) as res:
-                html = await res.text(encoding="ISO-8859-1")
-                soup = BeautifulSoup(html, "html.parser")
-                try:
-                    poster = soup.find("a", class_="movieCover")
-                    if poster:
-                        poster = poster.find("img")["src"]
-                        obj["poster"] = self.BASE_URL + poster
-                    imgs = (soup.find("div", class_="data")).find_all("img")
-                    if imgs and len(imgs) > 0:
-                        obj["screenshot"] = [img["src"] for img in imgs]
-                    magnet_and_torrent = soup.find_all("a", class_="kaGiantButton")
-                    magnet = magnet_and_torrent[0]["href"]
-                    obj["hash"] = re.search(
-                        r"([{a-f\d,A-F\d}]{32,40})\b", magnet
-                    ).group(0)
-                    obj["magnet"] = magnet
-                except:
-                    ...
+            poster = soup.find("a", class_="movieCover")
+            if poster:
+                poster = poster.find("img")["src"]
+                obj["poster"] = self.BASE_URL + poster
+            imgs = (soup.find("div", class_="data")).find_all("img")
+            if imgs and len(imgs) > 0:
+                obj["screenshot"] = [img["src"] for img in imgs]
+            magnet_and_torrent = soup.find_all("a", class_="kaGiantButton")
+            magnet = magnet_and_torrent[0]["href"]
+            obj["hash"] = re.search(
+                r"([{a-f\d,A-F\d}]{32,40})\b", magnet
+            ).group(0)
+            obj["magnet"] = magnet
         except:
-            return None
-
-    async def _get_torrent(self, result, session, urls):
-        tasks = []
-        for idx, url in enumerate(urls):
-            for obj in result["data"]:
-                if obj["url"] == url:
-                    task = asyncio.create_task(
-                        self._individual_scrap(session, url, result["data"][idx])
-                    )
-                    tasks.append(task)
-        await asyncio.gather(*tasks)
-        return result
+            ...
+        return obj
 
     def _parser(self, htmls):
         try:
             for html in htmls:
-                soup = BeautifulSoup(html, "html.parser")
+                soup = make_soup(html, self._regions)
                 list_of_urls = []
                 my_dict = {"data": []}
-                for tr in soup.select("tr.odd,tr.even"):
+                for tr in self.ROWS.select(soup):
                     td = tr.find_all("td")
                     name = tr.find("a", class_="cellMainLink").text.strip()
                     url = self.BASE_URL + tr.find("a", class_="cellMainLink")["href"]
@@ -97,44 +85,3 @@ class Kickass:
                 return my_dict, list_of_urls
         except:
             return None, None
-
-    async def search(self, query, page, limit):
-        async with aiohttp.ClientSession() as session:
-            start_time = time.time()
-            self.LIMIT = limit
-            url = self.BASE_URL + "/usearch/{}/{}/".format(query, page)
-            return await self.parser_result(start_time, url, session)
-
-    async def parser_result(self, start_time, url, session):
-        htmls = await Scraper().get_all_results(session, url)
-        result, urls = self._parser(htmls)
-        if result is not None:
-            results = await self._get_torrent(result, session, urls)
-            results["time"] = time.time() - start_time
-            results["total"] = len(results["data"])
-            return results
-        return result
-
-    async def trending(self, category, page, limit):
-        async with aiohttp.ClientSession() as session:
-            start_time = time.time()
-            self.LIMIT = limit
-            if not category:
-                url = self.BASE_URL + "/top-100"
-            else:
-                if category == "tv":
-                    category == "television"
-                elif category == "apps":
-                    category = "applications"
-                url = self.BASE_URL + "/top-100-{}/".format(category)
-            return await self.parser_result(start_time, url, session)
-
-    async def recent(self, category, page, limit):
-        async with aiohttp.ClientSession() as session:
-            start_time = time.time()
-            self.LIMIT = limit
-            if not category:
-                url = self.BASE_URL + "/new/"
-            else:
-                url = self.BASE_URL + "/{}/".format(category)
-            return await self.parser_result(start_time, url, session)
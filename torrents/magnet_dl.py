@@ -1,23 +1,71 @@
 import asyncio
+import os
 import re
-import time
-import aiohttp
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import cloudscraper
 import requests
-from bs4 import BeautifulSoup
+from bs4 import SoupStrainer
+from helper.html_parser import make_soup, Regions
+from helper.html_scraper import HTTP_TIMEOUT
+from helper.torrent_site import TorrentSite, Route
 from constants.base_url import MAGNETDL
 
+MAGNETDL_WORKERS = int(os.environ.get("MAGNETDL_WORKERS", 4))
 
-class Magnetdl:
+# cloudscraper is blocking, so it runs on its own small pool of threads
+# instead of the event loop.
+_executor = ThreadPoolExecutor(
+    max_workers=MAGNETDL_WORKERS, thread_name_prefix="magnetdl"
+)
+# requests sessions (and cloudscraper's challenge state) are not thread
+# safe: every thread has its own scraper, all sharing the first one's
+# cookie jar (the solved clearance cookies) and headers (the user agent
+# those cookies are bound to).
+_local = threading.local()
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def _get_cloud_scraper():
+    global _shared
+    scraper = getattr(_local, "scraper", None)
+    if scraper is None:
+        scraper = cloudscraper.create_scraper()
+        with _shared_lock:
+            if _shared is None:
+                _shared = scraper.cookies, dict(scraper.headers)
+        scraper.cookies = _shared[0]
+        scraper.headers.update(_shared[1])
+        _local.scraper = scraper
+    return scraper
+
+
+def _fetch(url):
+    try:
+        return _get_cloud_scraper().get(url, timeout=HTTP_TIMEOUT).text
+    except:
+        return None
+
+
+class Magnetdl(TorrentSite):
     _name = "MagnetDL"
-    def __init__(self):
-        self.BASE_URL = MAGNETDL
-        self.LIMIT = None
+    _regions = Regions(
+        SoupStrainer("tr"),
+        SoupStrainer("div", id="footer"),
+    )
+    BASE = MAGNETDL
+    SEARCH = Route("/{query[0]}/{query}/se/desc/{page}/")
+    RECENT = Route(
+        "/download/movies/{page}",
+        "/download/{category}/{page}/",
+        categories={"books": "e-books"},
+    )
 
     def _parser(self, htmls):
         try:
             for html in htmls:
-                soup = BeautifulSoup(html, "html.parser")
+                soup = make_soup(html, self._regions)
 
                 my_dict = {"data": []}
                 table = soup.find("table", class_="download")
@@ -82,44 +130,15 @@ class Magnetdl:
             return None
 
     async def _get_html(self, session, url):
-        session = cloudscraper.create_scraper(sess=session)
-        try:
-            return session.get(url).text
-        except:
-            return None
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, _fetch, url)
 
-    async def _get_all_results(self, session, url):
+    async def _get_pages(self, session, url):
         return await asyncio.gather(asyncio.create_task(self._get_html(session, url)))
 
-    async def search(self, query, page, limit):
-        async with aiohttp.ClientSession() as session:
-            start_time = time.time()
-            self.LIMIT = limit
-            query = requests.utils.unquote(query)
-            query = query.split(" ")
-            query = "-".join(query)
-            url = self.BASE_URL + "/{}/{}/se/desc/{}/".format(query[0], query, page)
-            return await self.parser_result(start_time, url, session)
-
-    async def parser_result(self, start_time, url, session):
-        data = await self._get_all_results(session, url)
-        results = self._parser(data)
-        if results is not None:
-            results["time"] = time.time() - start_time
-            results["total"] = len(results["data"])
-            return results
-        return results
-
-    async def recent(self, category, page, limit):
-        async with aiohttp.ClientSession() as session:
-            start_time = time.time()
-            self.LIMIT = limit
-            if not category:
-                url = self.BASE_URL + "/download/movies/{}".format(page)
-            else:
-                if category == "books":
-                    category = "e-books"
-                url = self.BASE_URL + "/download/{}/{}/".format(category, page)
-            return await self.parser_result(start_time, url, session)
+    def _query(self, query):
+        query = requests.utils.unquote(query)
+        query = query.split(" ")
+        return "-".join(query)
 
     #! maximum page in category is 30
@@ -1,21 +1,24 @@
 import re
-import time
-import aiohttp
-from bs4 import BeautifulSoup
-from helper.html_scraper import Scraper
+from bs4 import SoupStrainer
+from helper.html_parser import make_soup, Regions
+from helper.torrent_site import TorrentSite, Route
 from constants.base_url import NYAASI
 
 
-class NyaaSi:
+class NyaaSi(TorrentSite):
     _name = "Nyaa"
-    def __init__(self):
-        self.BASE_URL = NYAASI
-        self.LIMIT = None
+    _regions = Regions(
+        SoupStrainer("table"),
+        SoupStrainer("ul", class_="pagination"),
+    )
+    BASE = NYAASI
+    SEARCH = Route("/?f=0&c=0_0&q={query}&p={page}")
+    RECENT = Route("")
 
     def _parser(self, htmls):
         try:
             for html in htmls:
-                soup = BeautifulSoup(html, "html.parser")
+                soup = make_soup(html, self._regions)
 
                 my_dict = {"data": []}
                 for tr in (soup.find("table")).find_all("tr")[1:]:
@@ -63,26 +66,3 @@ class NyaaSi:
                 return my_dict
         except:
             return None
-
-    async def search(self, query, page, limit):
-        async with aiohttp.ClientSession() as session:
-            start_time = time.time()
-            self.LIMIT = limit
-            url = self.BASE_URL + "/?f=0&c=0_0&q={}&p={}".format(query, page)
-            return await self.parser_result(start_time, url, session)
-
-    async def parser_result(self, start_time, url, session):
-        html = await Scraper().get_all_results(session, url)
-        results = self._parser(html)
-        if results is not None:
-            results["time"] = time.time() - start_time
-            results["total"] = len(results["data"])
-            return results
-        return results
-
-    async def recent(self, category, page, limit):
-        async with aiohttp.ClientSession() as session:
-            start_time = time.time()
-            self.LIMIT = limit
-            url = self.BASE_URL
-            return await self.parser_result(start_time, url, session)
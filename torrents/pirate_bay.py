@@ -1,21 +1,24 @@
 import re
-import time
-import aiohttp
-from bs4 import BeautifulSoup
-from helper.html_scraper import Scraper
+from bs4 import SoupStrainer
+from helper.html_parser import make_soup, Regions
+from helper.torrent_site import TorrentSite, Route
 from constants.base_url import PIRATEBAY
 
 
-class PirateBay:
+class PirateBay(TorrentSite):
     _name = "Pirate Bay"
-    def __init__(self):
-        self.BASE_URL = PIRATEBAY
-        self.LIMIT = None
+    _regions = Regions(
+        SoupStrainer("tr"),
+    )
+    BASE = PIRATEBAY
+    SEARCH = Route("/search/{query}/{page}/99/0")
+    TRENDING = Route("/top/all")
+    RECENT = Route("/recent", "/{category}/latest/")
 
     def _parser(self, htmls):
         try:
             for html in htmls:
-                soup = BeautifulSoup(html, "html.parser")
+                soup = make_soup(html, self._regions)
 
                 my_dict = {"data": []}
                 for tr in soup.find_all("tr")[1:]:
@@ -64,36 +67,3 @@ class PirateBay:
                 return my_dict
         except:
             return None
-
-    async def search(self, query, page, limit):
-        async with aiohttp.ClientSession() as session:
-            start_time = time.time()
-            self.LIMIT = limit
-            url = self.BASE_URL + "/search/{}/{}/99/0".format(query, page)
-            return await self.parser_result(start_time, url, session)
-
-    async def parser_result(self, start_time, url, session):
-        html = await Scraper().get_all_results(session, url)
-        results = self._parser(html)
-        if results is not None:
-            results["time"] = time.time() - start_time
-            results["total"] = len(results["data"])
-            return results
-        return results
-
-    async def trending(self, category, page, limit):
-        async with aiohttp.ClientSession() as session:
-            start_time = time.time()
-            self.LIMIT = limit
-            url = self.BASE_URL + "/top/all"
-            return await self.parser_result(start_time, url, session)
-
-    async def recent(self, category, page, limit):
-        async with aiohttp.ClientSession() as session:
-            start_time = time.time()
-            self.LIMIT = limit
-            if not category:
-                url = self.BASE_URL + "/recent"
-            else:
-                url = self.BASE_URL + "/{}/latest/".format(category)
-            return await self.parser_result(start_time, url, session)
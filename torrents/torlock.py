@@ -1,71 +1,58 @@
-import asyncio
 import re
-import time
-import aiohttp
-from bs4 import BeautifulSoup
-from helper.asyncioPoliciesFix import decorator_asyncio_fix
-from helper.html_scraper import Scraper
+from bs4 import SoupStrainer
+from helper.html_parser import make_soup, Regions
+from helper.torrent_site import TorrentSite, Route
 from constants.base_url import TORLOCK
-from constants.headers import HEADER_AIO
 
 
-class Torlock:
+class Torlock(TorrentSite):
     _name = "Tor Lock"
-    def __init__(self):
-        self.BASE_URL = TORLOCK
-        self.LIMIT = None
+    _regions = Regions(
+        SoupStrainer("tr"),
+        SoupStrainer("ul", class_="pagination"),
+    )
+    BASE = TORLOCK
+    SEARCH = Route("/all/torrents/{query}.html?sort=seeds&page={page}", args=(5,))
+    TRENDING = Route("", "/{category}.html", categories={"books": "ebooks"})
+    RECENT = Route(
+        "/fresh.html",
+        "/{category}/{page}/added/desc.html",
+        categories={"books": "ebooks"},
+    )
 
-    @decorator_asyncio_fix
-    async def _individual_scrap(self, session, url, obj):
+    def _parse_detail(self, html):
+        obj = {}
+        soup = make_soup(html)
         try:
-            async with session.get(url, headers=HEADER_AIO) as res:
-                html = await res.text(encoding="ISO-8859-1")
-                soup = BeautifulSoup(html, "html.parser")
-                try:
-                    tm = soup.find_all("a")
-                    magnet = tm[20]["href"]
-                    torrent = tm[23]["href"]
-                    try:
-                        obj["poster"] = soup.find_all("img", class_="img-responsive")[
-                            0
-                        ]["src"]
-                    except:
-                        ...
-                    if str(magnet).startswith("magnet") and str(torrent).endswith(
-                        "torrent"
-                    ):
-                        obj["torrent"] = torrent
-                        obj["magnet"] = magnet
-                        obj["hash"] = re.search(
-                            r"([{a-f\d,A-F\d}]{32,40})\b", magnet
-                        ).group(0)
-                        obj["category"] = tm[25].text
-                        imgs = soup.select(".tab-content img.img-fluid")
-                        if imgs and len(imgs) > 0:
-                            obj["screenshot"] = [img["src"] for img in imgs]
-                    else:
-                        del obj
-                except IndexError:
-                    ...
-        except:
-            return None
-
-    async def _get_torrent(self, result, session, urls):
-        tasks = []
-        for idx, url in enumerate(urls):
-            for obj in result["data"]:
-                if obj["url"] == url:
-                    task = asyncio.create_task(
-                        self._individual_scrap(session, url, result["data"][idx])
-                    )
-                    tasks.append(task)
-        await asyncio.gather(*tasks)
-        return result
+            tm = soup.find_all("a")
+            magnet = tm[20]["href"]
+            torrent = tm[23]["href"]
+            try:
+                obj["poster"] = soup.find_all("img", class_="img-responsive")[
+                    0
+                ]["src"]
+            except:
+                ...
+            if str(magnet).startswith("magnet") and str(torrent).endswith(
+                "torrent"
+            ):
+                obj["torrent"] = torrent
+                obj["magnet"] = magnet
+                obj["hash"] = re.search(
+                    r"([{a-f\d,A-F\d}]{32,40})\b", magnet
+                ).group(0)
+                obj["category"] = tm[25].text
+                imgs = soup.select(".tab-content img.img-fluid")
+                if imgs and len(imgs) > 0:
+                    obj["screenshot"] = [img["src"] for img in imgs]
+        except IndexError:
+            ...
+        return obj
 
     def _parser(self, htmls, idx=0):
         try:
             for html in htmls:
-                soup = BeautifulSoup(html, "html.parser")
+                soup = make_soup(html, self._regions)
                 list_of_urls = []
                 my_dict = {"data": []}
 
@@ -111,47 +98,4 @@ class Torlock:
         except:
             return None, None
 
-    async def search(self, query, page, limit):
-        async with aiohttp.ClientSession() as session:
-            start_time = time.time()
-            self.LIMIT = limit
-            url = self.BASE_URL + "/all/torrents/{}.html?sort=seeds&page={}".format(
-                query, page
-            )
-            return await self.parser_result(start_time, url, session, idx=5)
-
-    async def parser_result(self, start_time, url, session, idx=0):
-        htmls = await Scraper().get_all_results(session, url)
-        result, urls = self._parser(htmls, idx)
-        if result is not None:
-            results = await self._get_torrent(result, session, urls)
-            results["time"] = time.time() - start_time
-            results["total"] = len(results["data"])
-            return results
-        return result
-
-    async def trending(self, category, page, limit):
-        async with aiohttp.ClientSession() as session:
-            start_time = time.time()
-            self.LIMIT = limit
-            if not category:
-                url = self.BASE_URL
-            else:
-                if category == "books":
-                    category = "ebooks"
-                url = self.BASE_URL + "/{}.html".format(category)
-            return await self.parser_result(start_time, url, session)
-
-    async def recent(self, category, page, limit):
-        async with aiohttp.ClientSession() as session:
-            start_time = time.time()
-            self.LIMIT = limit
-            if not category:
-                url = self.BASE_URL + "/fresh.html"
-            else:
-                if category == "books":
-                    category = "ebooks"
-                url = self.BASE_URL + "/{}/{}/added/desc.html".format(category, page)
-            return await self.parser_result(start_time, url, session)
-
     #! Maybe impelment Search By Category in Future
@@ -1,20 +1,34 @@
 import re
 import time
-import aiohttp
-from bs4 import BeautifulSoup
+from bs4 import SoupStrainer
+from helper.html_parser import make_soup, Regions
 from helper.html_scraper import Scraper
+from helper.torrent_site import TorrentSite, Route
 from constants.base_url import TGX
 
 
-class TorrentGalaxy:
+class TorrentGalaxy(TorrentSite):
     _name = "Torrent Galaxy"
-    def __init__(self):
-        self.BASE_URL = TGX
-        self.LIMIT = None
+    _regions = Regions(
+        SoupStrainer("div", class_="tgxtablerow"),
+        SoupStrainer("span", class_="badge-secondary"),
+        SoupStrainer("ul", class_="pagination"),
+    )
+    BASE = TGX
+    SEARCH = Route(
+        "/torrents.php?search=+{query}&sort=seeders&order=desc&page={page0}"
+    )
+    TRENDING = Route("")
+    RECENT = Route(
+        "/latest",
+        "/torrents.php?parent_cat={category}&sort=id&order=desc&page={page0}",
+        categories={"Documentaries": "Docus"},
+        category_case="capitalize",
+    )
 
     def _parser_individual(self, html):
         try:
-            soup = BeautifulSoup(html[0], "html.parser")
+            soup = make_soup(html[0])
             my_dict = {"data": []}
             root_div = soup.find("div", class_="gluewrapper")
             post_nd_torrents = root_div.find_next("div").find_all("div")
@@ -85,7 +99,7 @@ class TorrentGalaxy:
     def _parser(self, htmls):
         try:
             for html in htmls:
-                soup = BeautifulSoup(html, "html.parser")
+                soup = make_soup(html, self._regions)
 
                 my_dict = {"data": []}
                 for idx, divs in enumerate(soup.find_all("div", class_="tgxtablerow")):
@@ -170,59 +184,11 @@ class TorrentGalaxy:
         except:
             return None
 
-    async def search(self, query, page, limit):
-        async with aiohttp.ClientSession() as session:
-            start_time = time.time()
-            self.LIMIT = limit
-            url = (
-                self.BASE_URL
-                + "/torrents.php?search=+{}&sort=seeders&order=desc&page={}".format(
-                    query, page - 1
-                )
-            )
-            return await self.parser_result(start_time, url, session)
-
     async def get_torrent_by_url(self, torrent_url):
-        async with aiohttp.ClientSession() as session:
+        async with Scraper.session() as session:
             start_time = time.time()
             return await self.parser_result(
-                start_time, torrent_url, session, is_individual=True
+                start_time, torrent_url, session, parser=self._parser_individual
             )
 
-    async def parser_result(self, start_time, url, session, is_individual=False):
-        html = await Scraper().get_all_results(session, url)
-        if is_individual:
-            results = self._parser_individual(html)
-        else:
-            results = self._parser(html)
-        if results is not None:
-            results["time"] = time.time() - start_time
-            results["total"] = len(results["data"])
-            return results
-        return results
-
-    async def trending(self, category, page, limit):
-        async with aiohttp.ClientSession() as session:
-            start_time = time.time()
-            self.LIMIT = limit
-            url = self.BASE_URL
-            return await self.parser_result(start_time, url, session)
-
-    async def recent(self, category, page, limit):
-        async with aiohttp.ClientSession() as session:
-            start_time = time.time()
-            self.LIMIT = limit
-            if not category:
-                url = self.BASE_URL + "/latest"
-            else:
-                if category == "documentaries":
-                    category = "Docus"
-                url = (
-                    self.BASE_URL
-                    + "/torrents.php?parent_cat={}&sort=id&order=desc&page={}".format(
-                        str(category).capitalize(), page - 1
-                    )
-                )
-            return await self.parser_result(start_time, url, session)
-
     #! Maybe Implemented in Future
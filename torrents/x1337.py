@@ -1,81 +1,72 @@
-import asyncio
 import re
-import time
-import aiohttp
-from bs4 import BeautifulSoup
-from helper.asyncioPoliciesFix import decorator_asyncio_fix
-from helper.html_scraper import Scraper
+from bs4 import SoupStrainer
+from helper.html_parser import make_soup, Regions, css
+from helper.streaming import StreamStop
+from helper.torrent_site import TorrentSite, Route
 from constants.base_url import X1337
-from constants.headers import HEADER_AIO
 
 
-class x1337:
+class x1337(TorrentSite):
     _name = "1337x"
-    def __init__(self):
-        self.BASE_URL = X1337
-        self.LIMIT = None
+    _regions = Regions(
+        SoupStrainer("tbody"),
+        SoupStrainer("div", class_="pagination"),
+    )
+    BASE = X1337
+    ROWS = css("tbody tr")
+    SEARCH = Route("/search/{query}/{page}/")
+    CATEGORY_SEARCH = Route(
+        None, "/category-search/{query}/{category}/{page}/", category_case="capitalize"
+    )
+    TRENDING = Route("/home/", "/popular-{category}", category_case="lower")
+    RECENT = Route("/trending", "/cat/{category}/{page}/", category_case="capitalize")
+    PAGE_ROWS = 20
 
-    @decorator_asyncio_fix
-    async def _individual_scrap(self, session, url, obj):
+    def _parse_detail(self, html):
+        obj = {}
+        soup = make_soup(html)
         try:
-            async with session.get(url, headers=HEADER_AIO) as res:
-                html = await res.text(encoding="ISO-8859-1")
-                soup = BeautifulSoup(html, "html.parser")
-                try:
-                    magnet = soup.select_one(".no-top-radius > div > ul > li > a")[
-                        "href"
-                    ]
-                    uls = soup.find_all("ul", class_="list")[1]
-                    lis = uls.find_all("li")[0]
-                    imgs = [
-                        img["data-original"]
-                        for img in (soup.find("div", id="description")).find_all("img")
-                        if img["data-original"].endswith((".png", ".jpg", ".jpeg"))
-                    ]
-                    files = [
-                        f.text for f in soup.find("div", id="files").find_all("li")
-                    ]
-                    if len(imgs) > 0:
-                        obj["screenshot"] = imgs
-                    obj["category"] = lis.find("span").text
-                    obj["files"] = files
-                    try:
-                        poster = soup.select_one("div.torrent-image img")["src"]
-                        if str(poster).startswith("//"):
-                            obj["poster"] = "https:" + poster
-                        elif str(poster).startswith("/"):
-                            obj["poster"] = self.BASE_URL + poster
-                    except:
-                        ...
-                    obj["magnet"] = magnet
+            magnet = soup.select_one(".no-top-radius > div > ul > li > a")[
+                "href"
+            ]
+            uls = soup.find_all("ul", class_="list")[1]
+            lis = uls.find_all("li")[0]
+            imgs = [
+                img["data-original"]
+                for img in (soup.find("div", id="description")).find_all("img")
+                if img["data-original"].endswith((".png", ".jpg", ".jpeg"))
+            ]
+            files = [
+                f.text for f in soup.find("div", id="files").find_all("li")
+            ]
+            if len(imgs) > 0:
+                obj["screenshot"] = imgs
+            obj["category"] = lis.find("span").text
+            obj["files"] = files
+            try:
+                poster = soup.select_one("div.torrent-image img")["src"]
+                if str(poster).startswith("//"):
+                    obj["poster"] = "https:" + poster
+                elif str(poster).startswith("/"):
+                    obj["poster"] = self.BASE_URL + poster
+            except:
+                ...
+            obj["magnet"] = magnet
 
-                    obj["hash"] = re.search(
-                        r"([{a-f\d,A-F\d}]{32,40})\b", magnet
-                    ).group(0)
-                except IndexError:
-                    ...
-        except:
-            return None
-
-    async def _get_torrent(self, result, session, urls):
-        tasks = []
-        for idx, url in enumerate(urls):
-            for obj in result["data"]:
-                if obj["url"] == url:
-                    task = asyncio.create_task(
-                        self._individual_scrap(session, url, result["data"][idx])
-                    )
-                    tasks.append(task)
-        await asyncio.gather(*tasks)
-        return result
+            obj["hash"] = re.search(
+                r"([{a-f\d,A-F\d}]{32,40})\b", magnet
+            ).group(0)
+        except IndexError:
+            ...
+        return obj
 
     def _parser(self, htmls):
         try:
             for html in htmls:
-                soup = BeautifulSoup(html, "html.parser")
+                soup = make_soup(html, self._regions)
                 list_of_urls = []
                 my_dict = {"data": []}
-                trs = soup.select("tbody tr")
+                trs = self.ROWS.select(soup)
                 for tr in trs:
                     td = tr.find_all("td")
                     name = td[0].find_all("a")[-1].text
@@ -115,78 +106,19 @@ class x1337:
         except:
             return None, None
 
-    async def search(self, query, page, limit):
-        async with aiohttp.ClientSession() as session:
-            self.LIMIT = limit
-            start_time = time.time()
-            url = self.BASE_URL + "/search/{}/{}/".format(query, page)
-            return await self.parser_result(
-                start_time, url, session, query=query, page=page
-            )
-
-    async def parser_result(self, start_time, url, session, page, query=None):
-        htmls = await Scraper().get_all_results(session, url)
-        result, urls = self._parser(htmls)
-        if result is not None:
-            results = await self._get_torrent(result, session, urls)
-            results["time"] = time.time() - start_time
-            results["total"] = len(results["data"])
-            if query is None:
-                return results
-            while True:
-                if len(results["data"]) >= self.LIMIT:
-                    results["data"] = results["data"][0 : self.LIMIT]
-                    results["total"] = len(results["data"])
-                    return results
-                page = page + 1
-                url = self.BASE_URL + "/search/{}/{}/".format(query, page)
-                htmls = await Scraper().get_all_results(session, url)
-                result, urls = self._parser(htmls)
-                if result is not None:
-                    if len(result["data"]) > 0:
-                        res = await self._get_torrent(result, session, urls)
-                        for obj in res["data"]:
-                            results["data"].append(obj)
-                        try:
-                            results["current_page"] = res["current_page"]
-                        except:
-                            ...
-                        results["time"] = time.time() - start_time
-                        results["total"] = len(results["data"])
-                    else:
-                        break
-                else:
-                    break
-            return results
-        return result
-
-    async def trending(self, category, page, limit):
-        async with aiohttp.ClientSession() as session:
-            start_time = time.time()
-            self.LIMIT = limit
-            if not category:
-                url = self.BASE_URL + "/home/"
-            else:
-                url = self.BASE_URL + "/popular-{}".format(category.lower())
-            return await self.parser_result(start_time, url, session, page)
-
-    async def recent(self, category, page, limit):
-        async with aiohttp.ClientSession() as session:
-            start_time = time.time()
-            self.LIMIT = limit
-            if not category:
-                url = self.BASE_URL + "/trending"
-            else:
-                url = self.BASE_URL + "/cat/{}/{}/".format(
-                    str(category).capitalize(), page
-                )
-            return await self.parser_result(start_time, url, session, page)
+    def _stream_stop(self, url):
+        # Each row starts with its name cell, pagination follows the table.
+        # total_pages is only on that block, so a paginated page is read up
+        # to it whatever the limit and only the footer is skipped.
+        paginated = not url.endswith(("/home/", "/trending")) and "/popular-" not in url
+        return StreamStop(
+            '<td class="coll-1 name">',
+            self.LIMIT,
+            '<div class="pagination">' if paginated else None,
+            "</ul>",
+        )
 
     async def search_by_category(self, query, category, page, limit):
-        async with aiohttp.ClientSession() as session:
-            start_time = time.time()
-            self.LIMIT = limit
-            url = self.BASE_URL + "/category-search/{}/{}/{}/".format(
-                query, category.capitalize(), page
-            )
-            return await self.parser_result(start_time, url, session, page, query)
+        return await self._listing(
+            self.CATEGORY_SEARCH, page, limit, self.DETAILS, query=query, category=category
+        )
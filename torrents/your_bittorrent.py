@@ -1,58 +1,54 @@
-import asyncio
-import time
-import aiohttp
-from bs4 import BeautifulSoup
-from helper.asyncioPoliciesFix import decorator_asyncio_fix
-from helper.html_scraper import Scraper
+from bs4 import SoupStrainer
+from helper.html_parser import make_soup, Regions
+from helper.torrent_site import TorrentSite, Route
 from constants.base_url import YOURBITTORRENT
-from constants.headers import HEADER_AIO
 
 
-class YourBittorrent:
+class YourBittorrent(TorrentSite):
     _name = "Your BitTorrent"
-    def __init__(self):
-        self.BASE_URL = YOURBITTORRENT
-        self.LIMIT = None
+    _regions = Regions(
+        SoupStrainer("tr"),
+    )
+    BASE = YOURBITTORRENT
+    SEARCH = Route("/?v=&c=&q={query}", args=(6,))
+    TRENDING = Route(
+        "/top.html",
+        "/{category}.html",
+        categories={"books": "ebooks"},
+        args=(1,),
+        category_args=(4,),
+    )
+    RECENT = Route(
+        "/new.html",
+        "/{category}/latest.html",
+        categories={"books": "ebooks"},
+        args=(1,),
+        category_args=(4,),
+    )
 
-    @decorator_asyncio_fix
-    async def _individual_scrap(self, session, url, obj):
+    def _parse_detail(self, html):
+        obj = {}
+        soup = make_soup(html)
         try:
-            async with session.get(url, headers=HEADER_AIO) as res:
-                html = await res.text(encoding="ISO-8859-1")
-                soup = BeautifulSoup(html, "html.parser")
-                try:
-                    container = soup.select_one("div.card-body.container")
-                    poster = (
-                        container.find("div")
-                        .find_all("div")[0]
-                        .find("picture")
-                        .find("img")["src"]
-                    )
-                    clearfix = soup.find("div", class_="clearfix")
-                    torrent = clearfix.find("div").find_all("div")[1].find("a")["href"]
-                    obj["torrent"] = torrent
-                    obj["poster"] = poster
-                except:
-                    ...
+            container = soup.select_one("div.card-body.container")
+            poster = (
+                container.find("div")
+                .find_all("div")[0]
+                .find("picture")
+                .find("img")["src"]
+            )
+            clearfix = soup.find("div", class_="clearfix")
+            torrent = clearfix.find("div").find_all("div")[1].find("a")["href"]
+            obj["torrent"] = torrent
+            obj["poster"] = poster
         except:
-            return None
-
-    async def _get_torrent(self, result, session, urls):
-        tasks = []
-        for idx, url in enumerate(urls):
-            for obj in result["data"]:
-                if obj["url"] == url:
-                    task = asyncio.create_task(
-                        self._individual_scrap(session, url, result["data"][idx])
-                    )
-                    tasks.append(task)
-        await asyncio.gather(*tasks)
-        return result
+            ...
+        return obj
 
     def _parser(self, htmls, idx=1):
         try:
             for html in htmls:
-                soup = BeautifulSoup(html, "html.parser")
+                soup = make_soup(html, self._regions)
                 list_of_urls = []
                 my_dict = {"data": []}
 
@@ -80,50 +76,3 @@ class YourBittorrent:
                 return my_dict, list_of_urls
         except:
             return None, None
-
-    async def search(self, query, page, limit):
-        async with aiohttp.ClientSession() as session:
-            start_time = time.time()
-            self.LIMIT = limit
-            url = self.BASE_URL + "/?v=&c=&q={}".format(query)
-            return await self.parser_result(start_time, url, session, idx=6)
-
-    async def parser_result(self, start_time, url, session, idx=1):
-        htmls = await Scraper().get_all_results(session, url)
-        result, urls = self._parser(htmls, idx)
-        if result is not None:
-            results = await self._get_torrent(result, session, urls)
-            results["time"] = time.time() - start_time
-            results["total"] = len(results["data"])
-            return results
-        return result
-
-    async def trending(self, category, page, limit):
-        async with aiohttp.ClientSession() as session:
-            start_time = time.time()
-            self.LIMIT = limit
-            idx = None
-            if not category:
-                url = self.BASE_URL + "/top.html"
-                idx = 1
-            else:
-                if category == "books":
-                    category = "ebooks"
-                url = self.BASE_URL + f"/{category}.html"
-                idx = 4
-            return await self.parser_result(start_time, url, session, idx)
-
-    async def recent(self, category, page, limit):
-        async with aiohttp.ClientSession() as session:
-            start_time = time.time()
-            self.LIMIT = limit
-            idx = None
-            if not category:
-                url = self.BASE_URL + "/new.html"
-                idx = 1
-            else:
-                if category == "books":
-                    category = "ebooks"
-                url = self.BASE_URL + f"/{category}/latest.html"
-                idx = 4
-            return await self.parser_result(start_time, url, session, idx)
@@ -1,21 +1,23 @@
 import re
-import time
-import aiohttp
-from bs4 import BeautifulSoup
-from helper.html_scraper import Scraper
+from bs4 import SoupStrainer
+from helper.html_parser import make_soup, Regions
+from helper.torrent_site import TorrentSite, Route
 from constants.base_url import ZOOQLE
 
 
-class Zooqle:
+class Zooqle(TorrentSite):
     _name = "Zooqle"
-    def __init__(self):
-        self.BASE_URL = ZOOQLE
-        self.LIMIT = None
+    _regions = Regions(
+        SoupStrainer("tr"),
+        SoupStrainer("ul", class_="pagination"),
+    )
+    BASE = ZOOQLE
+    SEARCH = Route("/search?pg={page}&q={query}&v=t")
 
     def _parser(self, htmls):
         try:
             for html in htmls:
-                soup = BeautifulSoup(html, "html.parser")
+                soup = make_soup(html, self._regions)
 
                 my_dict = {"data": []}
 
@@ -61,19 +63,3 @@ class Zooqle:
                 return my_dict
         except:
             return None
-
-    async def search(self, query, page, limit):
-        async with aiohttp.ClientSession() as session:
-            start_time = time.time()
-            self.LIMIT = limit
-            url = self.BASE_URL + "/search?pg={1}&q={0}&v=t".format(query, page)
-            return await self.parser_result(start_time, url, session)
-
-    async def parser_result(self, start_time, url, session):
-        html = await Scraper().get_all_results(session, url)
-        results = self._parser(html)
-        if results is not None:
-            results["time"] = time.time() - start_time
-            results["total"] = len(results["data"])
-            return results
-        return results